@@ -1,23 +1,56 @@
+import importlib
+
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
-from utils.data_loader import run_data_pipeline, load_data
-from tabs import stats, scenarios, heroes, players, heatmap, aspects
+from utils import config, profiling
+from utils.data_loader import get_refresher, unknown_heroes
 
 st.set_page_config(layout="wide")
 
-# Auto-refresh every 30 seconds
-st_autorefresh(interval=30_000, key="autorefresh_timer")
-
 st.title("MC/DC Game Tracker")
 
-# pull in raw Google Sheet data and format columns
-df = load_data()
+# latest Google Sheet data and the datasets for all data and every region,
+# kept current by a background refresher shared across sessions
+refresher = get_refresher(st.secrets["sheets"]["spreadsheet"])
+
+# Instead of rerunning the whole page on a timer, only this fragment reruns
+# on a short interval: it shows how fresh the data is and reruns the app
+# once the refresher has published a data version newer than the one shown
+@st.fragment(run_every=config.CHANGE_POLL_SECONDS)
+def data_status(rendered_version):
+    if refresher.version != rendered_version:
+        st.rerun(scope="app")
+
+    data_age = refresher.data_age()
+    if data_age is not None:
+        st.caption(f"Data updated {int(data_age // 60)}m {int(data_age % 60)}s ago")
+    if refresher.failures and rendered_version is not None:
+        st.warning(f"Couldn't refresh from the sheet ({refresher.failures} attempts), "
+                   "showing the last data loaded.")
+
+try:
+    snapshot, data_views = refresher.latest(timeout=config.FIRST_LOAD_TIMEOUT_SECONDS)
+except TimeoutError:
+    # the sheet is slow to answer on a cold start; the status fragment
+    # reruns the page once the first data is in
+    st.info("Still loading the game data, this page will update when it's ready.")
+    data_status(None)
+    st.stop()
+except RuntimeError:
+    # the first load failed; the refresher keeps retrying with backoff and
+    # the status fragment reruns the page once one succeeds
+    st.error(f"Couldn't load the game data, retrying: {refresher.last_error}")
+    data_status(None)
+    st.stop()
+region_outputs = data_views.regions
+
+data_status(snapshot.version)
 
 # create list of regions for top-level filter
-regions = ['All'] + df['region'].unique().tolist()
+regions = list(region_outputs)
 
-# set filter to "All" by default
-st.session_state.setdefault("region_filter", regions[0])
+# set filter to "All" by default, or if the selected region disappeared
+if st.session_state.get("region_filter") not in regions:
+    st.session_state["region_filter"] = regions[0]
 
 # create top-level filter for regions
 st.selectbox("Region",
@@ -25,34 +58,56 @@ st.selectbox("Region",
              key='region_filter')
 region = st.session_state.region_filter
 
-# if filter selected, filter down
-if region != 'All':
-    df = df[df['region']==region]
-
-# create subsequent datasets from optionally filtered data
-game_df, player_df, aspect_df, heatmap_df, full_df = run_data_pipeline(df)
-
-stats_tab, scenarios_tab, heroes_tab, aspects_tab, heatmap_tab, player_tab = st.tabs(['Stats',
-                                                                     'Scenarios',
-                                                                     'Heroes',
-                                                                     'Aspects',
-                                                                     'Heatmap',
-                                                                     'Players'])
-
-with stats_tab:
-    stats.render(game_df, player_df)
-
-with scenarios_tab: 
-    scenarios.render(game_df)
-
-with heroes_tab:
-    heroes.render(aspect_df)
-
-with aspects_tab:
-    aspects.render(aspect_df)
-
-with heatmap_tab:
-    heatmap.render(heatmap_df)
-
-with player_tab:
-    players.render(player_df, aspect_df)
\ No newline at end of file
+# look up the datasets and leaderboard aggregates for the selected region,
+# and the win-rate cube and activity buckets, which cover every region
+game_df, player_df, aspect_df, heatmap_df, full_df = region_outputs[region]
+aggregates = data_views.aggregates[region]
+cube = data_views.cube
+activity = data_views.activity
+
+# charts are cached per data version and region, so only the first view
+# after a data change builds them
+data_key = (snapshot.version, region)
+
+# tab modules, and the chart libraries they use, are imported the first
+# time one of their views renders instead of when the app starts
+def view(module, *args):
+    return lambda: importlib.import_module(f"tabs.{module}").render(*args)
+
+# each view renders only when called, so lazy mode builds just the selected one
+views = {
+    'Stats': view('stats', aggregates, data_key),
+    'Scenarios': view('scenarios', game_df, data_key),
+    'Heroes': view('heroes', aspect_df, data_key),
+    'Aspects': view('aspects', aggregates, data_key),
+    'Heatmap': view('heatmap', heatmap_df, data_key),
+    'Players': view('players', aggregates, data_key),
+    'Win Rates': view('winrates', cube, region, data_key),
+    'Trends': view('trends', activity, region, data_key),
+}
+
+if config.LAZY_TABS:
+    st.session_state.setdefault("active_view", "Stats")
+    st.radio("View",
+             list(views),
+             key="active_view",
+             horizontal=True,
+             label_visibility="collapsed")
+
+    views[st.session_state.active_view]()
+
+else:
+    for tab, render_view in zip(st.tabs(list(views)), views.values()):
+        with tab:
+            render_view()
+
+# rows quarantined by ingest validation and heroes missing from the
+# reference data, only when enabled with MCDC_ADMIN
+if config.ADMIN:
+    with st.expander("Admin"):
+        view('admin', snapshot.rejected, unknown_heroes(region_outputs['All'][1]))()
+
+# performance panel, only when profiling is enabled with MCDC_PROFILE
+if profiling.ENABLED:
+    with st.expander("Performance"):
+        view('debug')()
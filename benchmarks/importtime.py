@@ -0,0 +1,134 @@
+"""
+Check the app's cold start import time against a budget, measured with
+`python -X importtime` in fresh interpreters, the way a new worker process
+starts.
+
+    python -m benchmarks.importtime --output imports.json
+
+Exits with status 1 when an import budget is exceeded or a module that
+should load lazily (DEFERRED_MODULES) is imported at startup, so it can
+guard cold start in CI.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.pipeline import environment
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# what app.py imports before its first line runs
+STARTUP_MODULES = ['streamlit', 'utils.config', 'utils.profiling', 'utils.data_loader']
+
+# imported by the first view rendered: its tab module and the chart builders
+FIRST_VIEW_MODULES = ['tabs.stats', 'altair']
+
+# modules only imported on first use, never at startup
+DEFERRED_MODULES = ['altair', 'pyarrow.parquet', 'tabs']
+
+DEFAULT_STARTUP_BUDGET_MS = 1500
+DEFAULT_FIRST_VIEW_BUDGET_MS = 1000
+
+
+def import_times(modules: list) -> dict:
+    """
+    Cumulative import time in microseconds of every module a fresh
+    interpreter loads to import `modules`, from -X importtime.
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=APP_DIR, capture_output=True, text=True, check=True)
+
+    # "import time: self [us] | cumulative | imported package", nested
+    # imports are indented under the module that imported them
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        indent = len(name) - len(name.lstrip())
+        times[name.strip()] = {'cumulative_us': int(cumulative), 'top_level': indent == 1}
+
+    return times
+
+
+def total_ms(times: dict) -> float:
+    return sum(t['cumulative_us'] for t in times.values() if t['top_level']) / 1000
+
+
+def measure(repeat: int) -> dict:
+    """
+    Fastest of `repeat` cold imports of the startup modules alone and with
+    the first view's, so a busy machine or cold disk cache doesn't fail the
+    budget.
+    """
+    startup_runs = [import_times(STARTUP_MODULES) for _ in range(repeat)]
+    full_runs = [import_times(STARTUP_MODULES + FIRST_VIEW_MODULES) for _ in range(repeat)]
+
+    startup = min(startup_runs, key=total_ms)
+    full = min(full_runs, key=total_ms)
+
+    deferred = sorted(name for name in startup
+                      if any(name == module or name.startswith(module + '.')
+                             for module in DEFERRED_MODULES))
+
+    slowest = sorted(((name, t['cumulative_us']) for name, t in startup.items()
+                      if t['top_level']), key=lambda item: -item[1])
+
+    return {'startup_ms': total_ms(startup),
+            'first_view_ms': total_ms(full) - total_ms(startup),
+            'deferred_imported_at_startup': deferred,
+            'startup_top_level_ms': {name: us / 1000 for name, us in slowest}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check cold start import time against a budget.")
+    parser.add_argument('--startup-budget-ms', type=float, default=DEFAULT_STARTUP_BUDGET_MS)
+    parser.add_argument('--first-view-budget-ms', type=float,
+                        default=DEFAULT_FIRST_VIEW_BUDGET_MS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeat)
+
+    failures = []
+    if results['startup_ms'] > args.startup_budget_ms:
+        failures.append(f"startup imports took {results['startup_ms']:.0f} ms, "
+                        f"over the {args.startup_budget_ms:.0f} ms budget")
+    if results['first_view_ms'] > args.first_view_budget_ms:
+        failures.append(f"first view imports took {results['first_view_ms']:.0f} ms, "
+                        f"over the {args.first_view_budget_ms:.0f} ms budget")
+    if results['deferred_imported_at_startup']:
+        failures.append("imported at startup instead of on first use: "
+                        + ", ".join(results['deferred_imported_at_startup']))
+
+    for name, ms in results['startup_top_level_ms'].items():
+        print(f"{name:<40} {ms:>8.1f} ms")
+    print(f"{'startup':<40} {results['startup_ms']:>8.1f} ms "
+          f"(budget {args.startup_budget_ms:.0f} ms)")
+    print(f"{'first view':<40} {results['first_view_ms']:>8.1f} ms "
+          f"(budget {args.first_view_budget_ms:.0f} ms)")
+
+    report = {'environment': environment(),
+              'budgets': {'startup_ms': args.startup_budget_ms,
+                          'first_view_ms': args.first_view_budget_ms},
+              'results': results,
+              'failures': failures}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+    return report
+
+
+if __name__ == '__main__':
+    main()
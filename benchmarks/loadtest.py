@@ -0,0 +1,341 @@
+"""
+Load test the app the way convention-day traffic hits it: start a headless
+`streamlit run` against a synthetic sheet and drive many concurrent
+sessions through region and view switches over Streamlit's websocket
+protocol, like a browser tab would.
+
+    python -m benchmarks.loadtest --sessions 50 --steps 20 --output load.json
+
+Reports rerun latency percentiles per kind of interaction, throughput,
+server CPU time and resident memory per session. Results are written as
+JSON so runs from different commits can be diffed. Server CPU and memory
+are read from /proc and are only reported on Linux.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+from benchmarks.pipeline import environment
+from benchmarks.synthetic import write_sheet
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# labels of the widgets sessions interact with, see app.py
+REGION_LABEL = "Region"
+VIEW_LABEL = "View"
+
+# script runs that end a rerun, anything else (a run stopped early for a
+# newer rerun) is followed by another run
+_FINISHED = {ForwardMsg.FINISHED_SUCCESSFULLY,
+             ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+             ForwardMsg.FINISHED_WITH_COMPILE_ERROR}
+
+_MAX_MESSAGE_BYTES = 200 * 2**20
+
+
+class Session:
+    """
+    One browser tab: a websocket connection that sends the widget values a
+    user changed and times each rerun until the script finishes.
+    """
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.conn = None
+        # widget id -> WidgetState, sent in full with every rerun
+        self.widget_states = {}
+        # label -> (element type, widget id, options) of the region and view widgets
+        self.widgets = {}
+        # fragment id -> (interval, next run) for st.fragment(run_every=...)
+        self.fragments = {}
+        self.timings = []
+        self.errors = 0
+
+    async def connect(self):
+        self.conn = await websocket_connect(self.url, subprotocols=["streamlit"],
+                                           max_message_size=_MAX_MESSAGE_BYTES)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+    async def rerun(self, kind: str, fragment_id: str = ""):
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.widget_states.widgets.extend(self.widget_states.values())
+        if fragment_id:
+            client_state.fragment_id = fragment_id
+            client_state.is_auto_rerun = True
+
+        start = time.perf_counter()
+        await self.conn.write_message(msg.SerializeToString(), binary=True)
+        await asyncio.wait_for(self._read_until_finished(), self.timeout)
+        self.timings.append((kind, time.perf_counter() - start))
+
+    async def _read_until_finished(self):
+        while True:
+            data = await self.conn.read_message()
+            if data is None:
+                raise ConnectionError("server closed the connection")
+
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            kind = msg.WhichOneof("type")
+
+            if kind == "delta":
+                self._read_delta(msg.delta)
+            elif kind == "auto_rerun":
+                self.fragments[msg.auto_rerun.fragment_id] = (
+                    msg.auto_rerun.interval, time.monotonic() + msg.auto_rerun.interval)
+            elif kind == "script_finished" and msg.script_finished in _FINISHED:
+                return
+
+    def _read_delta(self, delta):
+        if not delta.HasField("new_element"):
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+
+        if kind == "exception":
+            self.errors += 1
+        elif kind in ("selectbox", "radio"):
+            widget = getattr(element, kind)
+            if widget.label in (REGION_LABEL, VIEW_LABEL):
+                self.widgets[widget.label] = (kind, widget.id, list(widget.options))
+
+    def select(self, label: str, option: str):
+        kind, widget_id, options = self.widgets[label]
+        state = WidgetState(id=widget_id)
+        # selectboxes send the option, radios the option's index
+        if kind == "selectbox":
+            state.string_value = option
+        else:
+            state.int_value = options.index(option)
+        self.widget_states[widget_id] = state
+
+    def due_fragments(self) -> list:
+        now = time.monotonic()
+        return [fragment_id for fragment_id, (_, due) in self.fragments.items() if due <= now]
+
+    def schedule_fragment(self, fragment_id: str):
+        interval, _ = self.fragments[fragment_id]
+        self.fragments[fragment_id] = (interval, time.monotonic() + interval)
+
+
+async def run_session(session: Session, steps: int, think: float, rng: random.Random):
+    """
+    Load the app, then take `steps` random actions, switching region or
+    view, with a random pause between them. The polling fragment is rerun
+    whenever it's due, as the browser would.
+    """
+    await session.connect()
+    try:
+        await session.rerun("initial")
+
+        for _ in range(steps):
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+
+            for fragment_id in session.due_fragments():
+                await session.rerun("fragment", fragment_id)
+                session.schedule_fragment(fragment_id)
+
+            choices = [label for label in (REGION_LABEL, VIEW_LABEL) if label in session.widgets]
+            if not choices:
+                break
+            label = rng.choice(choices)
+            session.select(label, rng.choice(session.widgets[label][2]))
+            await session.rerun("region" if label == REGION_LABEL else "view")
+    finally:
+        session.close()
+
+
+def process_stats(pid: int) -> dict | None:
+    """
+    CPU seconds used and resident memory of a process, from /proc.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # fields after the parenthesized command name
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration):
+        return None
+
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {"cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks,
+            "rss_bytes": rss_kb * 1024}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir: str, submissions: int, seed: int, port: int, lazy_tabs: bool):
+    """
+    Start the app against a synthetic sheet, with its own secrets file and
+    snapshot directory so nothing outside `workdir` is read or written.
+    """
+    sheet = write_sheet(os.path.join(workdir, "sheet.csv"), submissions, seed=seed)
+    secrets = os.path.join(workdir, "secrets.toml")
+    with open(secrets, "w") as f:
+        f.write(f"[sheets]\nspreadsheet = {json.dumps(sheet)}\n")
+
+    env = {**os.environ,
+           "MCDC_SNAPSHOT_DIR": os.path.join(workdir, "snapshots"),
+           "MCDC_LAZY_TABS": "1" if lazy_tabs else "0"}
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py",
+         "--server.headless", "true",
+         "--server.address", "127.0.0.1",
+         "--server.port", str(port),
+         "--browser.gatherUsageStats", "false",
+         "--secrets.files", secrets],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited with code {server.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError("streamlit didn't become healthy within 60s")
+
+
+def percentiles(seconds: list) -> dict:
+    if not seconds:
+        return {"count": 0}
+    ms = np.array(seconds) * 1000
+    return {"count": len(ms),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p90_ms": float(np.percentile(ms, 90)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "max_ms": float(ms.max())}
+
+
+async def load_test(url: str, pid: int, sessions: int, steps: int, think: float,
+                    ramp: float, timeout: float, seed: int) -> dict:
+    # one session first so the data load and cold chart builds aren't
+    # counted against the concurrent sessions
+    warmup = Session(url, timeout)
+    await run_session(warmup, steps=0, think=0, rng=random.Random(seed))
+    baseline = process_stats(pid)
+
+    clients = [Session(url, timeout) for _ in range(sessions)]
+
+    async def start(i, session):
+        await asyncio.sleep(ramp * i / max(sessions, 1))
+        await run_session(session, steps, think, random.Random(seed + i + 1))
+
+    start_time = time.perf_counter()
+    outcomes = await asyncio.gather(*(start(i, s) for i, s in enumerate(clients)),
+                                    return_exceptions=True)
+    elapsed = time.perf_counter() - start_time
+    loaded = process_stats(pid)
+
+    timings = [timing for session in clients for timing in session.timings]
+    by_kind = {}
+    for kind, seconds in timings:
+        by_kind.setdefault(kind, []).append(seconds)
+
+    report = {"sessions": sessions,
+              "steps": steps,
+              "failed_sessions": sum(isinstance(outcome, Exception) for outcome in outcomes),
+              "script_errors": sum(session.errors for session in clients),
+              "cold_start_ms": warmup.timings[0][1] * 1000,
+              "elapsed_seconds": elapsed,
+              "reruns_per_second": len(timings) / elapsed,
+              "latency": {"all": percentiles([seconds for _, seconds in timings]),
+                          **{kind: percentiles(seconds) for kind, seconds in by_kind.items()}}}
+
+    if baseline and loaded:
+        report["server"] = {
+            "cpu_seconds": loaded["cpu_seconds"] - baseline["cpu_seconds"],
+            "cpu_utilization": (loaded["cpu_seconds"] - baseline["cpu_seconds"]) / elapsed,
+            "rss_bytes": loaded["rss_bytes"],
+            "rss_bytes_per_session": (loaded["rss_bytes"] - baseline["rss_bytes"]) / max(sessions, 1)}
+
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Drive concurrent sessions through the app and time their reruns.")
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--steps', type=int, default=20,
+                        help="region or view switches per session")
+    parser.add_argument('--submissions', type=int, default=10_000,
+                        help="rows in the synthetic sheet")
+    parser.add_argument('--think', type=float, default=0.5,
+                        help="mean pause between a session's actions, in seconds")
+    parser.add_argument('--ramp', type=float, default=5.0,
+                        help="seconds over which sessions connect")
+    parser.add_argument('--timeout', type=float, default=120.0,
+                        help="seconds before a rerun counts as failed")
+    parser.add_argument('--eager-tabs', action='store_true',
+                        help="render every tab on each rerun (MCDC_LAZY_TABS=0)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as workdir:
+        server = start_server(workdir, args.submissions, args.seed, port,
+                              lazy_tabs=not args.eager_tabs)
+        try:
+            results = asyncio.run(load_test(
+                f"ws://127.0.0.1:{port}/_stcore/stream", server.pid,
+                args.sessions, args.steps, args.think, args.ramp, args.timeout, args.seed))
+        finally:
+            server.terminate()
+            server.wait()
+
+    results["submissions"] = args.submissions
+    results["lazy_tabs"] = not args.eager_tabs
+
+    print(f"{results['sessions']} sessions, {results['reruns_per_second']:.1f} reruns/s, "
+          f"cold start {results['cold_start_ms']:.0f} ms, "
+          f"{results['failed_sessions']} failed, {results['script_errors']} script errors")
+    for kind, stats in results["latency"].items():
+        if stats["count"]:
+            print(f"{kind:<10} {stats['count']:>6} reruns  p50 {stats['p50_ms']:>8.1f} ms  "
+                  f"p90 {stats['p90_ms']:>8.1f} ms  p99 {stats['p99_ms']:>8.1f} ms")
+    if "server" in results:
+        server_stats = results["server"]
+        print(f"server CPU {server_stats['cpu_utilization']:.0%}, "
+              f"RSS {server_stats['rss_bytes'] / 2**20:.0f} MiB, "
+              f"{server_stats['rss_bytes_per_session'] / 2**20:.2f} MiB per session")
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    return report
+
+
+if __name__ == '__main__':
+    main()
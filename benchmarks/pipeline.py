@@ -0,0 +1,158 @@
+"""
+Time each data_loader pipeline stage against synthetic convention-scale
+sheets and record peak memory, without any secrets or sheet access.
+
+    python -m benchmarks.pipeline --sizes 1000 10000 --output bench.json
+
+Results are written as JSON so runs from different commits can be diffed.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_sheet
+from utils import config, data_loader
+from utils.ingest import IncrementalSheetLoader
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def pipeline_stages(path: str):
+    """
+    The run_data_pipeline steps as (name, function) pairs. Each function
+    takes the outputs so far (a dict) and returns the frame it produced.
+    """
+
+    def load_sheet(state):
+        # the app's ingest: chunked parsing with the column dtypes, column
+        # names normalized, schema applied and rows validated; a new loader
+        # each time, so every run parses the whole sheet
+        return IncrementalSheetLoader(
+            path, normalize=data_loader.normalize_column_names,
+            schema=data_loader.apply_schema, dtypes=data_loader.column_dtypes,
+            validate=data_loader.validate_rows,
+            chunk_size=config.INGEST_CHUNK_ROWS).load()
+
+    def game_df(state):
+        return state['load_sheet'][['submission_id', 'submission_time', 'region',
+                                   'number_of_players', 'scenario', 'difficulty',
+                                   'skirmish_mode', 'outcome']].copy().drop_duplicates()
+
+    def reshape_players(state):
+        return data_loader.reshape_players(state['load_sheet'])
+
+    def merge_aspects(state):
+        return data_loader.merge_aspects(state['reshape_players'].copy())
+
+    def explode_with_weights(state):
+        return data_loader.explode_with_weights(state['merge_aspects'],
+                                                'aspect', 'individual_aspect',
+                                                columns=['submission_id', 'player_num', 'hero'])
+
+    def replace_with_other(state):
+        return data_loader.replace_with_other(
+            state['explode_with_weights'].copy(),
+            allowed_set=data_loader.REFERENCE.aspect_set,
+            col='individual_aspect')
+
+    def get_heatmap_data(state):
+        return data_loader.get_heatmap_data(
+            state['replace_with_other'][['hero', 'individual_aspect', 'value']])
+
+    def full_merge(state):
+        return pd.merge(state['merge_aspects'], state['game_df'],
+                        how='left', on='submission_id')
+
+    def run_data_pipeline(state):
+        return data_loader.run_data_pipeline(state['load_sheet'])[0]
+
+    stages = [load_sheet, game_df, reshape_players, merge_aspects,
+              explode_with_weights, replace_with_other, get_heatmap_data,
+              full_merge, run_data_pipeline]
+
+    return [(stage.__name__, stage) for stage in stages]
+
+
+def measure(func, state, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = func(state)
+        timings.append(time.perf_counter() - start)
+
+    # separate traced run so tracemalloc overhead doesn't skew the timings
+    tracemalloc.start()
+    func(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return out, {'seconds_min': min(timings),
+                 'seconds_median': float(np.median(timings)),
+                 'peak_memory_bytes': peak}
+
+
+def benchmark_size(n: int, repeat: int, workdir: str, seed: int = 0) -> list:
+    path = write_sheet(os.path.join(workdir, f'sheet_{n}.csv'), n, seed=seed)
+
+    state, results = {}, []
+    for name, func in pipeline_stages(path):
+        out, stats = measure(func, state, repeat)
+        state[name] = out
+
+        results.append({'submissions': n, 'stage': name,
+                        'rows_out': len(out), **stats})
+
+    return results
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {'commit': commit,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the data_loader pipeline on synthetic sheets.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            for row in benchmark_size(n, args.repeat, workdir, seed=args.seed):
+                results.append(row)
+                print(f"{row['submissions']:>9} {row['stage']:<22} "
+                      f"{row['seconds_min'] * 1000:>10.1f} ms "
+                      f"{row['peak_memory_bytes'] / 2**20:>9.1f} MiB "
+                      f"{row['rows_out']:>9} rows")
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+REGIONS = ['East', 'West', 'Central', 'Online']
+
+SCENARIOS = ['Rhino', 'Klaw', 'Ultron', 'Green Goblin', 'Red Skull',
+             'Kang', 'Magneto', 'Mansion Attack', 'Sinister Six']
+
+DIFFICULTIES = ['Standard', 'Expert', 'Heroic 1', 'Heroic 2']
+
+HEROES = ["Black Panther (T'challa)", "Captain Marvel", "Ironman", "She-Hulk",
+          "Spider-Man (Peter)", "Captain America", "Ms. Marvel", "Thor",
+          "Black Widow", "Doctor Strange", "Hulk", "Hawkeye", "Groot",
+          "Rocket Racoon", "Venom", "Nebula", "Wolverine", "Storm", "Deadpool"]
+
+# heroes logged through the multi-aspect question on the form
+MULTI_ASPECT_HEROES = ["Spider-Woman", "Adam Warlock"]
+
+ASPECTS = ['Aggression', 'Basic', 'Justice', 'Leadership', 'Pool', 'Protection']
+
+
+def generate_submissions(n: int, seed: int = 0, max_players: int = 4) -> pd.DataFrame:
+    """
+    Create a synthetic form export shaped like the MC/DC Google Form
+    responses, with the original (un-normalized) column headers.
+
+    Parameters
+    ----------
+    n : int
+        number of submissions
+    seed : int, optional
+        random seed, the same seed always produces the same sheet
+    max_players : int, optional
+        number of _player_N question blocks on the form
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per submission
+    """
+    rng = np.random.default_rng(seed)
+
+    number_of_players = rng.integers(1, max_players + 1, n)
+    minutes = np.sort(rng.integers(0, 3 * 24 * 60, n))
+
+    sheet = {
+        'Submission ID': [f'sub-{i:07d}' for i in range(n)],
+        'Submission Time': (pd.Timestamp('2026-05-01 09:00')
+                            + pd.to_timedelta(minutes, unit='min')).astype(str),
+        'Region': rng.choice(REGIONS, n),
+        'Number of Players': number_of_players,
+        'Scenario': rng.choice(SCENARIOS, n),
+        'Difficulty': rng.choice(DIFFICULTIES, n, p=[0.55, 0.3, 0.1, 0.05]),
+        'Skirmish Mode': rng.choice(['Yes', 'No'], n, p=[0.2, 0.8]),
+        'Outcome': rng.choice(['Win', 'Loss'], n),
+    }
+
+    all_heroes = np.array(HEROES + MULTI_ASPECT_HEROES, dtype=object)
+    aspect_pairs = np.array([f'{a}, {b}' for i, a in enumerate(ASPECTS[:4])
+                             for b in ASPECTS[i + 1:4]], dtype=object)
+
+    for player in range(1, max_players + 1):
+        playing = number_of_players >= player
+
+        hero = rng.choice(all_heroes, n)
+        multi = np.isin(hero, MULTI_ASPECT_HEROES)
+
+        name = np.array([f'Player {i}' for i in rng.integers(1, max(50, n // 20), n)],
+                        dtype=object)
+        aspect = rng.choice(np.array(ASPECTS, dtype=object), n)
+        multi_aspect = rng.choice(aspect_pairs, n)
+
+        sheet[f'Name (Player {player})'] = np.where(playing, name, None)
+        sheet[f'Hero (Player {player})'] = np.where(playing, hero, None)
+        sheet[f'Aspect (Player {player})'] = np.where(playing & ~multi, aspect, None)
+        sheet[f'Multi-Aspect (Player {player})'] = np.where(playing & multi, multi_aspect, None)
+
+    return pd.DataFrame(sheet)
+
+
+def write_sheet(path: str, n: int, seed: int = 0):
+    generate_submissions(n, seed=seed).to_csv(path, index=False)
+    return path
@@ -0,0 +1,25 @@
+import streamlit as st
+from utils.profiling import instrument
+
+@instrument("tab.admin")
+def render(rejected, unknown_heroes):
+
+    st.title("Rejected Submissions")
+
+    if rejected is None or rejected.empty:
+        st.info("Every submission in the sheet passed validation.")
+    else:
+        st.caption(f"{len(rejected)} rows were left out of the dashboard. "
+                   "Fix them in the sheet and they are picked up on the next refresh.")
+
+        st.dataframe(rejected, hide_index=True, width="stretch")
+
+    st.title("Unknown Heroes")
+
+    if unknown_heroes.empty:
+        st.info("Every hero played is in the reference data.")
+    else:
+        st.caption("These heroes are missing from the heatmap. Add them, or an alias "
+                   "for a misspelling, to the reference data file.")
+
+        st.dataframe(unknown_heroes, hide_index=True, width="stretch")
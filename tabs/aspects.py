@@ -1,21 +1,23 @@
 import streamlit as st
-from utils.charts import bar_chart, donut_chart
+from utils.charts import ChartView, bar_chart, donut_chart, draw
+from utils.profiling import instrument
 
-def render(aspect_df):
+def charts(aggregates, data_key=None):
+    aspects_played = aggregates.aspects_played()
 
-    st.title("Aspects")
+    return [ChartView("Plays", data_key, bar_chart, (aspects_played,),
+                      dict(y='individual_aspect', x='plays', title="",
+                           color='individual_aspect', colorScheme='aspect',
+                           height=600, width=600, text='plays')),
+            ChartView("Share", data_key, donut_chart, (aspects_played,),
+                      dict(category_col='individual_aspect', value_col='plays',
+                           colorScheme='aspect'))]
+
+@instrument("tab.aspects")
+def render(aggregates, data_key=None):
 
-    aspects_played = aspect_df.groupby('individual_aspect').aggregate(plays=('value', 'sum')).reset_index()
-   
-    col1, col2 = st.columns([2,1])
+    st.title("Aspects")
 
-    with col1:
-        st.altair_chart(
-        bar_chart(aspects_played,
-                  y='individual_aspect', x='plays', title="",
-                  color='individual_aspect', colorScheme='aspect',
-                  height=600, width=600, text='plays'))
-        
-    with col2:
-        st.altair_chart(donut_chart(aspects_played, category_col='individual_aspect',
-                                    value_col='plays', colorScheme='aspect'))
\ No newline at end of file
+    for col, chart in zip(st.columns([2, 1]), charts(aggregates, data_key)):
+        with col:
+            draw(chart)
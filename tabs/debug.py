@@ -0,0 +1,21 @@
+import streamlit as st
+import pandas as pd
+from utils import profiling
+
+def render():
+
+    st.title("Performance")
+
+    records = profiling.get_records()
+    if not records:
+        st.info("No spans recorded yet.")
+        return
+
+    st.header("By Stage")
+    st.dataframe(profiling.summarize(records), width="stretch")
+
+    st.header("Recent Spans")
+    st.dataframe(pd.DataFrame(records[::-1][:200]), width="stretch")
+
+    st.download_button("Download JSON", profiling.export_json(),
+                       file_name="mcdc_profile.json", mime="application/json")
@@ -1,33 +1,29 @@
 import streamlit as st
-import pandas as pd
-import altair as alt
-from utils.charts import bar_chart, heatmap_chart
-from utils.data_loader import get_heatmap_data
-
-def render(heatmap_df):
+from utils.charts import ChartView, draw, heatmap_chart
+from utils.profiling import instrument
+from utils.reference import REFERENCE
+
+# rows of heatmap_df drawn in each of the three columns: a third of the
+# heroes each, with one row per aspect
+_PART_ROWS = -(-len(REFERENCE.heroes) // 3) * len(REFERENCE.aspects)
+HEATMAP_PARTS = [(0, _PART_ROWS), (_PART_ROWS, 2 * _PART_ROWS), (2 * _PART_ROWS, None)]
+
+def charts(heatmap_df, data_key=None):
+    # each part is a separate chart of the same data version
+    return [ChartView("", None if data_key is None else (data_key, start, stop),
+                      heatmap_chart, (heatmap_df.iloc[start:stop, :],),
+                      dict(x='individual_aspect', y='hero', color='value',
+                           x_title="Aspect", y_title="Hero", color_title="Value"))
+            for start, stop in HEATMAP_PARTS]
+
+@instrument("tab.heatmap")
+def render(heatmap_df, data_key=None):
 
     st.title("Hero/Aspect Heatmap")
 
-    col1, col2, col3 = st.columns(3, gap='xsmall')
-
-    with col1:
-
-        heatmap = heatmap_chart(heatmap_df.iloc[0:138,:], x='individual_aspect', y='hero', color='value',
-                            x_title="Aspect", y_title="Hero", color_title="Value")
-
-        st.altair_chart(heatmap, use_container_width=False)
-
-    with col2:
-
-        heatmap = heatmap_chart(heatmap_df.iloc[138:276, :], x='individual_aspect', y='hero', color='value',
-                            x_title="Aspect", y_title="Hero", color_title="Value")
-
-        st.altair_chart(heatmap, use_container_width=False)
-
-    with col3:
-
-        heatmap = heatmap_chart(heatmap_df.iloc[276:,:], x='individual_aspect', y='hero', color='value',
-                            x_title="Aspect", y_title="Hero", color_title="Value")
+    columns = st.columns(3, gap='xsmall')
 
-        st.altair_chart(heatmap, use_container_width=False)
+    for col, chart in zip(columns, charts(heatmap_df, data_key)):
 
+        with col:
+            draw(chart, display_width='content')
@@ -1,15 +1,17 @@
 import streamlit as st
-from utils.charts import bar_chart
-from utils.data_loader import explode_with_weights, replace_with_other
+from utils.charts import ChartView, bar_chart, draw
+from utils.profiling import instrument
 
-def render(aspect_df):
+def charts(aspect_df, data_key=None):
+    return [ChartView("Heroes", data_key, bar_chart, (aspect_df,),
+                      dict(y='hero:N', x='value', title="",
+                           color='individual_aspect', colorScheme='aspect',
+                           height=1200, width=600, aggregate=True))]
+
+@instrument("tab.heroes")
+def render(aspect_df, data_key=None):
 
     st.title("Heroes")
-   
-    st.altair_chart(
-        bar_chart(aspect_df,
-                  y='hero:N', x='value', title="",
-                  color='individual_aspect', colorScheme='aspect',
-                  height=1200, width=600
-                  )
-    )
\ No newline at end of file
+
+    for chart in charts(aspect_df, data_key):
+        draw(chart)
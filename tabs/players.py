@@ -1,57 +1,69 @@
+import math
+
 import streamlit as st
-from utils.charts import bar_chart
+from utils.charts import ChartView, bar_chart, draw
+from utils.profiling import instrument
+from utils.reference import REFERENCE
+
+# players shown in each leaderboard chart
+TOP_N = 25
+
+# rows per page of the deck table
+PAGE_SIZE = 50
+
+def charts(aggregates, data_key=None):
 
-def render(player_df, aspect_df):
+    # both charts plot one bar per player, so each needs its own cache key
+    def chart_key(chart):
+        return None if data_key is None else (data_key, chart)
+
+    return [ChartView("Most Games Played", chart_key('games'), bar_chart,
+                      (aggregates.games_played_by_name(top=TOP_N),),
+                      dict(y='name:N', x='plays', title="", text='plays')),
+            ChartView("Most Heroes Played", chart_key('heroes'), bar_chart,
+                      (aggregates.heroes_played_by_name(top=TOP_N),),
+                      dict(y='name:N', x='plays', title="", text='plays'))]
+
+@instrument("tab.players")
+def render(aggregates, data_key=None):
 
     st.title("Player Leaderboards")
 
-    st.header("Most Games Played")
+    for chart in charts(aggregates, data_key):
+        st.header(chart.heading)
+        draw(chart)
 
-    most_games_played = player_df.groupby(['name']).aggregate(plays=('name', 'count')).reset_index()
-    
-    games_bar = bar_chart(most_games_played,
-                  y='name:N', x='plays', title="", text='plays')
-    
-    st.altair_chart(games_bar)
+        top_players = chart.args[0]
+        st.caption(f"Top {len(top_players)} of {aggregates.distinct_players} players")
 
 
-    st.header("Most Heroes Played")
+    st.header("Most Played Single Deck")
 
-    most_heroes_df = (player_df[['name', 'hero']].drop_duplicates()
-                     .groupby(['name'])
-                     .aggregate(plays=('name', 'count'))).reset_index()
+    most_plays_df = aggregates.deck_plays()
 
-    hero_bar = bar_chart(most_heroes_df,
-                  y='name:N', x='plays', title="", text='plays')
+    # search and paging run on the server, only one page is sent and styled
+    search = st.text_input("Search", key="deck_search",
+                           placeholder="Player, hero or aspect",
+                           on_change=lambda: st.session_state.update(deck_page=1))
+    if search:
+        matches = aggregates.deck_search_text().str.contains(search.strip().lower(),
+                                                             regex=False)
+        most_plays_df = most_plays_df[matches.to_numpy()]
 
-    
-    st.altair_chart(hero_bar)
+    n_pages = max(1, math.ceil(len(most_plays_df) / PAGE_SIZE))
 
+    # the previous page can be past the end after a new search or region
+    if st.session_state.get("deck_page", 1) > n_pages:
+        st.session_state["deck_page"] = n_pages
 
-    most_plays_df = (player_df[['name', 'hero', 'aspect']]
-                     .groupby(['name', 'hero', 'aspect'])
-                     .aggregate(plays=('name', 'count'))
-    ).reset_index()
+    page = st.number_input("Page", min_value=1, max_value=n_pages, step=1, key="deck_page")
+    page_df = most_plays_df.iloc[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
 
-    # Define the styling function for individual cells
-    def color_rating(aspect):
-        if aspect == 'Aggression':
-            color = '#FF4500'
-        elif aspect == 'Basic':
-            color = 'lightgrey'
-        elif aspect == 'Leadership':
-            color = '#0086EB'
-        elif aspect == 'Justice':
-            color = '#FFD700'
-        elif aspect == 'Pool':
-            color = 'pink'
-        elif aspect == 'Protection':
-            color = '#00C853'                                            
-        else:
-            color = 'grey'
-        return f'background-color: {color}'
+    # color each aspect cell with a lookup of the precomputed cell styles
+    def color_rating(aspects):
+        return [REFERENCE.aspect_style(aspect) for aspect in aspects]
 
-    styled_df = most_plays_df.style.map(color_rating, subset=['aspect'])
+    styled_df = page_df.style.apply(color_rating, subset=['aspect'])
 
-    st.header("Most Played Single Deck")
-    st.dataframe(styled_df, use_container_width=True)
\ No newline at end of file
+    st.dataframe(styled_df, width="stretch")
+    st.caption(f"{len(most_plays_df)} decks, page {page} of {n_pages}")
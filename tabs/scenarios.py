@@ -1,23 +1,21 @@
 import streamlit as st
-from utils.charts import bar_chart
+from utils.charts import ChartView, bar_chart, draw
+from utils.profiling import instrument
 
-def render(game_df):
+def charts(game_df, data_key=None):
+    return [ChartView("Scenarios", data_key, bar_chart, (game_df,),
+                      dict(y='scenario', x='count', color='outcome',
+                           colorScheme='scenario', title='', aggregate=True)),
+            ChartView("Difficulty", data_key, bar_chart, (game_df,),
+                      dict(y='difficulty', x='count', color='outcome', colorScheme='scenario',
+                           title="", aggregate=True))]
 
-    st.title("Scenarios")
-
-    scenario_col, difficulty_col = st.columns(2)
+@instrument("tab.scenarios")
+def render(game_df, data_key=None):
 
-    with scenario_col:
-        st.header("Scenarios")
-        st.altair_chart(
-            bar_chart(game_df,
-                    y='scenario', x='count', color='outcome',
-                     colorScheme='scenario', title='')
-        )
+    st.title("Scenarios")
 
-    with difficulty_col:
-        st.header("Difficulty")
-        st.altair_chart(
-            bar_chart(game_df,
-                    y='difficulty', x='count', color='outcome', colorScheme='scenario', title="")
-        )
\ No newline at end of file
+    for col, chart in zip(st.columns(2), charts(game_df, data_key)):
+        with col:
+            st.header(chart.heading)
+            draw(chart)
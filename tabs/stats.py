@@ -1,38 +1,38 @@
 import streamlit as st
-import pandas as pd
-from utils.charts import donut_chart
-
-st.set_page_config(layout="wide")
-
-def render(game_df, player_df):
+from utils.charts import ChartView, donut_chart, draw
+from utils.profiling import instrument
+
+def metrics(aggregates):
+    """
+    (label, value, format) of the headline numbers.
+    """
+    return [("Games Played", aggregates.games, None),
+            ("Players", aggregates.distinct_players, None),
+            ("Scenarios", aggregates.distinct_scenarios, None),
+            ("Heroes", aggregates.distinct_heroes, None),
+            ("Win Rate", round(aggregates.win_rate, 2), "percent"),
+            ("Hero & Aspect Combinations", aggregates.hero_aspect_combinations, None)]
+
+def charts(aggregates, data_key=None):
+    return [ChartView("Player Count", data_key, donut_chart, (aggregates.player_count_games(),),
+                      dict(category_col='number_of_players', value_col='games'))]
+
+@instrument("tab.stats")
+def render(aggregates, data_key=None):
 
     stats_col, player_count_col = st.columns(2)
 
     with stats_col:
         st.header("Stats")
 
-        metric_1, metric_2 = st.columns(2)
-        metric_3, metric_4 = st.columns(2)
-        metric_5, metric_6 = st.columns(2)
-
-        metric_1.metric(value=len(game_df.submission_id.drop_duplicates().dropna()),
-                    label="Games Played", border=True)
-            
-        metric_2.metric(value=len(player_df.name.drop_duplicates()),
-                    label="Players", border=True)
-            
-        metric_3.metric(value=len(game_df.scenario.drop_duplicates().dropna()),
-                        label="Scenarios", border=True)
-        
-        metric_4.metric(value=len(player_df.hero.drop_duplicates().dropna()),
-                        label="Heroes", border=True)
-        
-        metric_5.metric(value=round(len(game_df.query("outcome=='Win'"))/len(game_df),2), format="percent",
-                        label="Win Rate", border=True)
-
-        metric_6.metric(value=player_df[['hero', 'aspect']].drop_duplicates().shape[0],
-                        label="Hero & Aspect Combinations", border=True)
+        # two metrics per row
+        rows = [st.columns(2) for _ in range(3)]
+        cells = [cell for row in rows for cell in row]
+
+        for cell, (label, value, format) in zip(cells, metrics(aggregates)):
+            cell.metric(value=value, label=label, format=format, border=True)
 
     with player_count_col:
-        st.header("Player Count")
-        st.altair_chart(donut_chart(game_df, category_col='number_of_players'))
\ No newline at end of file
+        for chart in charts(aggregates, data_key):
+            st.header(chart.heading)
+            draw(chart)
@@ -0,0 +1,72 @@
+import streamlit as st
+from utils.charts import ChartView, draw, line_chart
+from utils.profiling import instrument
+
+# bucket widths the charts can be drawn at, in minutes
+RESOLUTIONS = {15: "15 minutes", 60: "1 hour"}
+
+# heroes plotted in the popularity chart
+TOP_HEROES = 8
+
+def resolutions(activity):
+    """
+    Bucket widths the charts can be drawn at, narrowest first. Buckets can
+    be redrawn wider, not narrower, than they are kept.
+    """
+    bucket_minutes = int(activity.width.total_seconds() // 60)
+    return [minutes for minutes in RESOLUTIONS
+            if minutes >= bucket_minutes and minutes % bucket_minutes == 0] or [bucket_minutes]
+
+def metrics(activity, region):
+    """
+    (label, value) of the recent activity counts.
+    """
+    last_hour = activity.window(60, region)
+    last_quarter = activity.window(15, region)
+
+    return [("Games in the Last Hour", last_hour['games']),
+            ("Players in the Last Hour", last_hour['players']),
+            ("Games in the Last 15 Minutes", last_quarter['games'])]
+
+def charts(activity, region, minutes, data_key=None):
+
+    def chart_key(chart):
+        return None if data_key is None else (data_key, chart, minutes)
+
+    views = [ChartView("Games", chart_key('games'), line_chart,
+                       (activity.timeline(region, minutes),),
+                       dict(x='bucket:T', y='games:Q', title=""))]
+
+    if region == 'All':
+        views.append(ChartView("Games by Region", chart_key('regions'), line_chart,
+                               (activity.region_timeline(minutes),),
+                               dict(x='bucket:T', y='games:Q', color='region:N', title="")))
+
+    views.append(ChartView("Hero Popularity", chart_key('heroes'), line_chart,
+                           (activity.hero_timeline(region, top=TOP_HEROES, minutes=minutes),),
+                           dict(x='bucket:T', y='plays:Q', color='hero:N', title="")))
+    return views
+
+@instrument("tab.trends")
+def render(activity, region, data_key=None):
+
+    st.title("Trends")
+
+    if activity.empty:
+        st.info("No submissions with a submission time yet.")
+        return
+
+    for col, (label, value) in zip(st.columns(3), metrics(activity, region)):
+        col.metric(label, value)
+
+    st.caption(f"Counted up to the latest submission, {activity.latest:%a %H:%M}")
+
+    minutes = st.selectbox("Bucket", resolutions(activity),
+                           format_func=lambda minutes: RESOLUTIONS.get(minutes, f"{minutes} minutes"),
+                           key="trends_bucket")
+
+    for chart in charts(activity, region, minutes, data_key):
+        st.header(chart.heading)
+        draw(chart)
+
+    st.caption(f"The {TOP_HEROES} heroes played most in the time shown")
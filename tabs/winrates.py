@@ -0,0 +1,67 @@
+import streamlit as st
+from utils.charts import bar_chart, show_chart
+from utils.profiling import instrument
+
+# dimensions the win rate can be broken down by and filtered on
+DIMENSION_LABELS = {
+    'hero': "Hero",
+    'individual_aspect': "Aspect",
+    'scenario': "Scenario",
+    'difficulty': "Difficulty",
+    'number_of_players': "Number of Players",
+    'skirmish_mode': "Skirmish Mode",
+}
+
+@instrument("tab.winrates")
+def render(cube, region, data_key=None):
+
+    st.title("Win Rates")
+
+    by_col, min_col = st.columns([2, 1])
+
+    with by_col:
+        by = st.selectbox("Win rate by", list(DIMENSION_LABELS),
+                          format_func=DIMENSION_LABELS.get, key="winrate_by")
+
+    with min_col:
+        min_plays = st.number_input("Minimum plays", min_value=1, value=5, step=1,
+                                    key="winrate_min_plays")
+
+    # filter on every other dimension, an empty filter keeps everything
+    where = {}
+    filters = [dim for dim in DIMENSION_LABELS if dim != by]
+    for col, dim in zip(st.columns(len(filters)), filters):
+        with col:
+            selected = st.multiselect(DIMENSION_LABELS[dim], cube.levels(dim),
+                                      key=f"winrate_{dim}")
+        if selected:
+            where[dim] = selected
+
+    if region != 'All':
+        where['region'] = region
+
+    win_rates = cube.query([by], where)
+    win_rates = win_rates[win_rates['plays'] >= min_plays].reset_index(drop=True)
+
+    if win_rates.empty:
+        st.info("No games match these filters.")
+        return
+
+    # the chart data depends on the query, so it is part of the cache key
+    query_key = None if data_key is None else (
+        data_key, by, min_plays, tuple((dim, tuple(values) if isinstance(values, list) else values)
+                                       for dim, values in sorted(where.items())))
+
+    show_chart(query_key, bar_chart, win_rates,
+               y=f'{by}:N', x='win_rate', title="",
+               height=max(200, 25 * len(win_rates)), width=600)
+
+    st.dataframe(win_rates[[by, 'plays', 'wins', 'win_rate']]
+                 .sort_values('win_rate', ascending=False)
+                 .rename(columns={by: DIMENSION_LABELS[by], 'plays': "Plays",
+                                  'wins': "Wins", 'win_rate': "Win Rate"}),
+                 hide_index=True, width="stretch",
+                 column_config={"Win Rate": st.column_config.ProgressColumn(
+                     format="percent", min_value=0.0, max_value=1.0),
+                                "Plays": st.column_config.NumberColumn(format="%.1f"),
+                                "Wins": st.column_config.NumberColumn(format="%.1f")})
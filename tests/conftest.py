@@ -0,0 +1,56 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", default=False,
+                     help="also run the tests marked slow")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: takes minutes, only runs with --runslow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow, run with --runslow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture
+def appended_load(tmp_path):
+    """
+    A sheet loaded with 60 submissions, then with 40 more appended: some
+    from a region not seen before, one with a hero missing from the
+    reference data and one that fails validation. Returns the (Snapshot,
+    region outputs) of both loads.
+    """
+    from benchmarks.synthetic import generate_submissions
+    from utils.data_loader import (Snapshot, apply_schema, column_dtypes,
+                                   normalize_column_names, run_data_pipeline,
+                                   split_by_region, validate_rows)
+    from utils.ingest import IncrementalSheetLoader
+
+    sheet = generate_submissions(100, seed=7)
+    sheet.loc[70:79, 'Region'] = 'Atlantis'
+    sheet.loc[85, 'Hero (Player 1)'] = 'Nova'
+    sheet.loc[90, 'Outcome'] = 'Draw'
+    lines = sheet.to_csv(index=False).splitlines(keepends=True)
+
+    path = tmp_path / "sheet.csv"
+    loader = IncrementalSheetLoader(str(path), normalize=normalize_column_names,
+                                    schema=apply_schema, dtypes=column_dtypes,
+                                    validate=validate_rows)
+
+    loads = []
+    for rows in (60, 100):
+        path.write_text("".join(lines[:rows + 1]))
+        df = loader.load()
+        snapshot = Snapshot(loader.version, df, 0.0, str(path),
+                            loader.base_version, loader.appended_from, loader.rejected)
+        loads.append((snapshot, split_by_region(run_data_pipeline(df))))
+
+    assert loads[1][0].appended_from == 60
+    return loads
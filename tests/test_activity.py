@@ -0,0 +1,34 @@
+import pandas as pd
+
+from utils.activity import ActivityBuckets
+from utils.data_loader import DataViews, appended_frames, build_activity
+
+
+def test_appended_rows_match_a_full_rebuild(appended_load):
+    (before, before_outputs), (after, after_outputs) = appended_load
+    previous = (before, DataViews(before_outputs, None, None, build_activity(before_outputs)))
+
+    incremental = build_activity(after_outputs, previous, appended_frames(after, previous))
+    full = ActivityBuckets.from_frames(*after_outputs['All'][:2])
+
+    assert incremental.latest == full.latest
+    for name in ('games', 'players', 'hero_plays'):
+        assert getattr(incremental, name) == getattr(full, name), name
+    assert sum(incremental.games.values()) > 60
+    assert any(region == 'Atlantis' for _, region in incremental.games)
+    assert incremental.window(60) == full.window(60)
+
+
+def test_window_narrower_than_a_bucket():
+    game_df = pd.DataFrame({'submission_id': ['a', 'b', 'c'],
+                            'region': ['East'] * 3,
+                            'submission_time': ['2026-03-05 10:01', '2026-03-05 10:20',
+                                                '2026-03-05 10:40']})
+    player_df = pd.DataFrame({'submission_id': ['a', 'b', 'c'], 'hero': ['Thor'] * 3})
+    activity = ActivityBuckets(minutes=15)
+    activity.update(game_df, player_df)
+
+    # 15 minute buckets: 10:40 is in the 10:30 bucket
+    assert activity.window(5) == {'games': 1, 'players': 1}
+    assert activity.window(15) == {'games': 2, 'players': 2}
+    assert activity.window(60, region='West') == {'games': 0, 'players': 0}
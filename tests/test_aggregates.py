@@ -0,0 +1,43 @@
+import pytest
+
+from utils.aggregates import RunningAggregates
+from utils.data_loader import DataViews, appended_frames, build_aggregates
+
+
+def assert_same_counts(aggregates, expected, region):
+    # public state; weighted aspect plays are float sums in another order
+    state, expected_state = (
+        {name: value for name, value in vars(a).items() if not name.startswith('_')}
+        for a in (aggregates, expected))
+    assert (dict(state.pop('aspect_plays'))
+            == pytest.approx(dict(expected_state.pop('aspect_plays')))), region
+    assert state == expected_state, region
+
+
+def test_appended_rows_match_a_full_rebuild(appended_load):
+    (before, before_outputs), (after, after_outputs) = appended_load
+    previous = (before, DataViews(before_outputs, build_aggregates(before_outputs), None, None))
+
+    appended = appended_frames(after, previous)
+    assert appended is not None
+
+    incremental = build_aggregates(after_outputs, previous, appended)
+    assert list(incremental) == list(after_outputs)
+    assert 'Atlantis' in incremental
+
+    for region, outputs in after_outputs.items():
+        assert_same_counts(incremental[region], RunningAggregates.from_frames(*outputs[:3]),
+                           region)
+
+
+def test_previous_aggregates_are_left_as_they_were(appended_load):
+    (before, before_outputs), (after, after_outputs) = appended_load
+    aggregates = build_aggregates(before_outputs)
+    games = aggregates['All'].games
+    heroes = dict(aggregates['All'].heroes)
+
+    previous = (before, DataViews(before_outputs, aggregates, None, None))
+    build_aggregates(after_outputs, previous, appended_frames(after, previous))
+
+    assert aggregates['All'].games == games
+    assert dict(aggregates['All'].heroes) == heroes
@@ -0,0 +1,203 @@
+import http.server
+import threading
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+from benchmarks.synthetic import generate_submissions
+from utils.data_loader import apply_schema, column_dtypes, normalize_column_names, validate_rows
+from utils.ingest import IncrementalSheetLoader, fetch_source
+
+
+def sheet_lines(n, seed=0):
+    # header and one CSV line per submission
+    return generate_submissions(n, seed=seed).to_csv(index=False).splitlines(keepends=True)
+
+
+def loader(path):
+    return IncrementalSheetLoader(str(path), normalize=normalize_column_names,
+                                  schema=apply_schema, dtypes=column_dtypes,
+                                  validate=validate_rows, chunk_size=7)
+
+
+def assert_same_as_fresh(loaded, path):
+    # an incremental load has to end where loading the file from scratch does
+    fresh = loader(path)
+    fresh.load()
+    assert_frame_equal(loaded.df, fresh.df, check_categorical=False)
+    assert_frame_equal(loaded.rejected.reset_index(drop=True),
+                       fresh.rejected.reset_index(drop=True), check_dtype=False)
+
+
+@pytest.fixture
+def lines():
+    return sheet_lines(40)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "sheet.csv"
+
+
+def test_appends_new_rows(lines, path):
+    path.write_text("".join(lines[:21]))
+    sheet = loader(path)
+    sheet.load()
+    version = sheet.version
+
+    path.write_text("".join(lines))
+    sheet.load()
+
+    assert sheet.base_version == version
+    assert sheet.appended_from == 20
+    assert len(sheet.df) == 40
+    assert sheet.last_submission_id == sheet.df["submission_id"].iloc[-1]
+    assert_same_as_fresh(sheet, path)
+
+
+def test_unchanged_file_keeps_the_frame(lines, path):
+    path.write_text("".join(lines))
+    sheet = loader(path)
+    df = sheet.load()
+    assert sheet.load() is df
+
+
+@pytest.mark.parametrize("change", ["edit", "delete"])
+def test_changed_rows_reload(lines, path, change):
+    path.write_text("".join(lines[:21]))
+    sheet = loader(path)
+    sheet.load()
+
+    if change == "edit":
+        # a response corrected in place, and new rows after it
+        edited = lines[5].replace(",Win,", ",Loss,") if ",Win," in lines[5] \
+            else lines[5].replace(",Loss,", ",Win,")
+        assert edited != lines[5]
+        lines[5] = edited
+    else:
+        del lines[5]
+    path.write_text("".join(lines))
+    sheet.load()
+
+    assert sheet.base_version is None and sheet.appended_from is None
+    assert_same_as_fresh(sheet, path)
+
+
+def test_resubmitted_id_is_quarantined(lines, path):
+    path.write_text("".join(lines[:21]))
+    sheet = loader(path)
+    sheet.load()
+
+    # the form sent the third submission again
+    path.write_text("".join(lines[:21] + [lines[3]]))
+    sheet.load()
+
+    assert sheet.appended_from is None
+    assert len(sheet.df) == 20
+    assert sheet.rejected[["row", "reason"]].values.tolist() == [[22, "duplicate submission_id"]]
+    assert_same_as_fresh(sheet, path)
+
+
+def test_bad_appended_row_is_quarantined(lines, path):
+    path.write_text("".join(lines[:21]))
+    sheet = loader(path)
+    sheet.load()
+    assert sheet.rejected.empty
+
+    bad = lines[21].replace(",Win,", ",Draw,").replace(",Loss,", ",Draw,")
+    path.write_text("".join(lines[:21] + [bad] + lines[22:]))
+    sheet.load()
+
+    assert sheet.appended_from == 20
+    assert len(sheet.df) == 39
+    assert sheet.rejected[["row", "reason"]].values.tolist() == [[22, "unknown outcome"]]
+    assert_same_as_fresh(sheet, path)
+
+
+def test_dtype_that_no_longer_fits_reloads(path):
+    # without declared dtypes the columns are inferred, a text value in a
+    # number column can't be appended
+    path.write_text("submission_id,score\na,1\nb,2\n")
+    sheet = IncrementalSheetLoader(str(path))
+    sheet.load()
+    assert sheet.df["score"].dtype == "int64"
+
+    path.write_text("submission_id,score\na,1\nb,2\nc,three\n")
+    sheet.load()
+
+    assert sheet.appended_from is None
+    assert sheet.df["score"].tolist() == ["1", "2", "three"]
+
+
+def test_last_line_without_newline(lines, path):
+    body = "".join(lines[:21]).rstrip("\n")
+    path.write_text(body)
+    sheet = loader(path)
+    sheet.load()
+
+    # a new row after the unterminated last one is appended
+    path.write_text(body + "\n" + "".join(lines[21:]))
+    sheet.load()
+    assert sheet.appended_from == 20
+    assert_same_as_fresh(sheet, path)
+
+
+def test_last_line_extended_in_place_reloads(path):
+    path.write_text("submission_id,name\na,x\nb,Jo")
+    sheet = IncrementalSheetLoader(str(path))
+    sheet.load()
+
+    path.write_text("submission_id,name\na,x\nb,Jordan\nc,y\n")
+    sheet.load()
+
+    assert sheet.appended_from is None
+    assert sheet.df["name"].tolist() == ["x", "Jordan", "y"]
+
+
+@pytest.fixture
+def http_sheet(lines):
+    # serves the sheet with an ETag and answers 304 when it's unchanged
+    body = "".join(lines).encode()
+    requests = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/sheet.csv", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_source_not_modified(http_sheet):
+    url, requests = http_sheet
+    body, validators = fetch_source(url)
+    assert body and validators["etag"] == '"v1"'
+
+    assert fetch_source(url, validators) == (None, validators)
+    assert requests == [None, '"v1"']
+
+
+def test_not_modified_keeps_the_frame(http_sheet):
+    url, requests = http_sheet
+    sheet = loader(url)
+    df = sheet.load()
+    assert len(df) == 40
+
+    assert sheet.load() is df
+    assert requests == [None, '"v1"']
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from benchmarks.synthetic import generate_submissions
+from utils.data_loader import apply_schema, normalize_column_names, reshape_players
+
+
+def reshape_players_reference(df, id_col='submission_id', player_pattern=r'_player_\d+$'):
+    """
+    The melt + pivot_table reshape reshape_players replaced, kept as the
+    definition of its output.
+    """
+    player_cols = df.columns[df.columns.str.contains(player_pattern)]
+
+    feature_order = (
+        pd.Series(player_cols)
+        .str.replace(r'_player_\d+$', '', regex=True)
+        .drop_duplicates()
+        .tolist()
+    )
+
+    long = df.melt(id_vars=id_col, value_vars=player_cols,
+                   var_name='variable', value_name='value')
+
+    extracted = long['variable'].str.extract(r'^(?P<feature>.+)_player_(?P<player_num>\d+)$')
+    long = long.assign(
+        feature=extracted['feature'],
+        player_num=extracted['player_num'].astype(int)
+    ).drop(columns='variable')
+
+    player_df = long.pivot_table(index=[id_col, 'player_num'], columns='feature',
+                                 values='value', aggfunc='first')
+    player_df = player_df.dropna(how='all')
+    player_df = player_df.reindex(columns=feature_order)
+
+    player_df = player_df.reset_index()
+    player_df.columns.name = None
+    return player_df
+
+
+def sheet(n, seed=0):
+    return normalize_column_names(generate_submissions(n, seed=seed))
+
+
+def as_objects(df):
+    # the categorical columns of the schema hold the same values as objects
+    return df.astype({col: object for col in df.columns
+                      if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+@pytest.mark.parametrize("n", [10, 100, 10_000])
+def test_matches_reference(n):
+    df = sheet(n, seed=n)
+    assert_frame_equal(reshape_players(df), reshape_players_reference(df))
+
+
+@pytest.mark.parametrize("n", [100, 10_000])
+def test_matches_reference_with_schema(n):
+    # the schema also maps hero aliases, so the reference reshapes the
+    # schema's values
+    df = apply_schema(sheet(n, seed=n))
+    assert_frame_equal(as_objects(reshape_players(df)),
+                       reshape_players_reference(as_objects(df)))
+
+
+def test_drops_empty_players_and_missing_ids():
+    df = pd.DataFrame({
+        'submission_id': ['b', 'a', None],
+        'name_player_1': ['x', 'y', 'z'],
+        'hero_player_1': ['Thor', None, 'Hulk'],
+        'name_player_2': [None, 'w', 'v'],
+        'hero_player_2': [None, 'Groot', None],
+    })
+    expected = pd.DataFrame({
+        'submission_id': ['a', 'a', 'b'],
+        'player_num': [1, 2, 1],
+        'name': ['y', 'w', 'x'],
+        'hero': [np.nan, 'Groot', 'Thor'],
+    })
+    result = reshape_players(df)
+    assert_frame_equal(result, expected)
+    assert_frame_equal(result, reshape_players_reference(df))
+
+
+@pytest.mark.slow
+def test_matches_reference_1m():
+    df = sheet(1_000_000, seed=1)
+    assert_frame_equal(reshape_players(df), reshape_players_reference(df))
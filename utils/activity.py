@@ -0,0 +1,174 @@
+import copy
+from collections import Counter
+
+import pandas as pd
+
+from utils import config
+from utils.aggregates import _group_sizes
+
+
+class ActivityBuckets:
+    """
+    Games, player entries and hero plays per time bucket of
+    `submission_time` and region, for the Trends tab.
+
+    Like RunningAggregates, `update` only counts the rows of new
+    submissions and `advanced` returns an updated copy. Buckets older than
+    the retention window behind the newest submission are dropped, so the
+    counters grow with the number of buckets kept rather than the history.
+    """
+
+    def __init__(self, minutes: int = config.ACTIVITY_BUCKET_MINUTES,
+                 retention_hours: float = config.ACTIVITY_RETENTION_HOURS):
+        self.width = pd.Timedelta(minutes=minutes)
+        self.retention = pd.Timedelta(hours=retention_hours)
+
+        # (bucket start, region) -> games / player entries
+        self.games = Counter()
+        self.players = Counter()
+        # (bucket start, region, hero) -> player entries with that hero
+        self.hero_plays = Counter()
+
+        # newest submission_time counted
+        self.latest = None
+
+        self._frames = {}
+
+    def __getstate__(self):
+        # copies start without the cached frames of the original
+        return {**self.__dict__, '_frames': {}}
+
+    @classmethod
+    def from_frames(cls, game_df, player_df):
+        activity = cls()
+        activity.update(game_df, player_df)
+        return activity
+
+    def advanced(self, game_df, player_df):
+        # keys and counts are immutable, so copying the counters is enough
+        # (a deepcopy would copy every bucket timestamp)
+        activity = copy.copy(self)
+        activity.games = Counter(self.games)
+        activity.players = Counter(self.players)
+        activity.hero_plays = Counter(self.hero_plays)
+        activity.update(game_df, player_df)
+        return activity
+
+    def update(self, game_df, player_df):
+        self._frames = {}
+
+        times = pd.to_datetime(game_df['submission_time'], errors='coerce')
+        games = (game_df[['submission_id', 'region']]
+                 .assign(bucket=times.dt.floor(self.width))
+                 .dropna(subset=['bucket']))
+        plays = player_df[['submission_id', 'hero']].merge(
+            games[['submission_id', 'bucket', 'region']], how='inner', on='submission_id')
+
+        for counter, frame, cols in [
+            (self.games, games, ['bucket', 'region']),
+            (self.players, plays, ['bucket', 'region']),
+            (self.hero_plays, plays, ['bucket', 'region', 'hero']),
+        ]:
+            for key, n in _group_sizes(frame, cols).items():
+                counter[key] += n
+
+        newest = times.max()
+        if pd.notna(newest) and (self.latest is None or newest > self.latest):
+            self.latest = newest
+        self._drop_expired()
+
+    def _drop_expired(self):
+        if self.latest is None:
+            return
+        cutoff = self.latest.floor(self.width) - self.retention
+        for counter in (self.games, self.players, self.hero_plays):
+            for key in [key for key in counter if key[0] < cutoff]:
+                del counter[key]
+
+    def _frame(self, name, build) -> pd.DataFrame:
+        # tabs only read the frames, so one copy serves every session
+        if name not in self._frames:
+            self._frames[name] = build()
+        return self._frames[name]
+
+    @property
+    def empty(self) -> bool:
+        return not self.games
+
+    def _wide(self, counter, columns, region='All', by=None, minutes=None) -> pd.DataFrame:
+        """
+        Counts per bucket from `counter` (one column per `by` value, or a
+        single 'n' column), summed over regions unless `region` is one.
+        Empty buckets are 0, and `minutes` resamples to wider buckets.
+        """
+        rows = pd.DataFrame([(*key, n) for key, n in counter.items()], columns=[*columns, 'n'])
+        if region != 'All':
+            rows = rows[rows['region'] == region]
+
+        if by is None:
+            wide = rows.groupby('bucket')[['n']].sum()
+        else:
+            wide = rows.dropna(subset=[by]).pivot_table(index='bucket', columns=by, values='n',
+                                                        aggfunc='sum', fill_value=0)
+
+        buckets = pd.date_range(min(bucket for bucket, _ in self.games),
+                                self.latest.floor(self.width), freq=self.width)
+        wide = wide.reindex(buckets, fill_value=0)
+        if minutes:
+            wide = wide.resample(pd.Timedelta(minutes=minutes)).sum()
+
+        wide.index.name = 'bucket'
+        return wide
+
+    def timeline(self, region='All', minutes=None) -> pd.DataFrame:
+        """
+        Games and player entries per bucket.
+        """
+        def build():
+            columns = ['bucket', 'region']
+            return pd.DataFrame({
+                'games': self._wide(self.games, columns, region, minutes=minutes)['n'],
+                'players': self._wide(self.players, columns, region, minutes=minutes)['n'],
+            }).reset_index()
+
+        return self._frame(('timeline', region, minutes), build)
+
+    def region_timeline(self, minutes=None) -> pd.DataFrame:
+        """
+        Games per bucket and region, in long format.
+        """
+        def build():
+            wide = self._wide(self.games, ['bucket', 'region'], by='region', minutes=minutes)
+            return wide.reset_index().melt(id_vars='bucket', var_name='region',
+                                           value_name='games')
+
+        return self._frame(('region_timeline', minutes), build)
+
+    def hero_timeline(self, region='All', top=10, minutes=None) -> pd.DataFrame:
+        """
+        Plays per bucket of the `top` heroes played most over the buckets
+        kept, in long format.
+        """
+        def build():
+            wide = self._wide(self.hero_plays, ['bucket', 'region', 'hero'], region,
+                              by='hero', minutes=minutes)
+            heroes = wide.sum().nlargest(top).index
+            return wide[heroes].reset_index().melt(id_vars='bucket', var_name='hero',
+                                                   value_name='plays')
+
+        return self._frame(('hero_timeline', region, top, minutes), build)
+
+    def window(self, minutes=60, region='All') -> dict:
+        """
+        Games and player entries in the buckets that overlap the last
+        `minutes` up to the newest submission (not the clock, which may be
+        in another time zone than the form). A window narrower than a bucket
+        counts the newest bucket.
+        """
+        if self.latest is None:
+            return {'games': 0, 'players': 0}
+
+        start = self.latest - pd.Timedelta(minutes=minutes)
+        return {name: sum(n for (bucket, bucket_region), n in counter.items()
+                          if bucket + self.width > start and region in ('All', bucket_region))
+                for name, counter in [('games', self.games), ('players', self.players)]}
@@ -0,0 +1,183 @@
+import copy
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+
+def _group_sizes(df: pd.DataFrame, cols: list) -> dict:
+    """
+    Row counts per distinct key of `cols`, with missing values as None.
+    Grouping is vectorized, so only the distinct keys are touched in Python.
+    """
+    if df.empty:
+        return {}
+
+    sizes = df.groupby(cols, dropna=False, observed=True).size()
+    keys = sizes.index if len(cols) > 1 else ((key,) for key in sizes.index)
+
+    return {tuple(None if pd.isna(v) else v for v in key): int(n)
+            for key, n in zip(keys, sizes.to_numpy())}
+
+
+class RunningAggregates:
+    """
+    Leaderboard counters for the Stats, Aspects and Players tabs.
+
+    `update` adds the game, player and exploded aspect rows of new
+    submissions, so keeping the counters current costs O(new rows) rather
+    than a rescan of the whole history. Instances handed to the tabs are
+    never updated in place: `advanced` returns an updated copy. Leaderboard
+    frames are built once per instance and reused across reruns.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.game_rows = 0
+        self.wins = 0
+
+        self.names = Counter()
+        self.name_heroes = Counter()
+        self.decks = Counter()
+        self.heroes = Counter()
+        self.hero_aspects = Counter()
+        self.scenarios = Counter()
+        self.player_counts = Counter()
+        self.aspect_plays = defaultdict(float)
+
+        self._frames = {}
+
+    def __getstate__(self):
+        # copies start without the cached frames of the original
+        return {**self.__dict__, '_frames': {}}
+
+    @classmethod
+    def from_frames(cls, game_df, player_df, aspect_df):
+        aggregates = cls()
+        aggregates.update(game_df, player_df, aspect_df)
+        return aggregates
+
+    def advanced(self, game_df, player_df, aspect_df):
+        # keys and counts are immutable, so copying the counters is enough
+        # (a deepcopy would copy every key tuple)
+        aggregates = copy.copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, Counter):
+                setattr(aggregates, name, Counter(value))
+        aggregates.aspect_plays = defaultdict(float, self.aspect_plays)
+        aggregates.update(game_df, player_df, aspect_df)
+        return aggregates
+
+    def update(self, game_df, player_df, aspect_df):
+        self._frames = {}
+
+        self.games += game_df['submission_id'].dropna().nunique()
+        self.game_rows += len(game_df)
+        self.wins += int((game_df['outcome'] == 'Win').sum())
+
+        for counter, frame, cols in [
+            (self.names, player_df, ['name']),
+            (self.name_heroes, player_df, ['name', 'hero']),
+            (self.decks, player_df, ['name', 'hero', 'aspect']),
+            (self.heroes, player_df, ['hero']),
+            (self.hero_aspects, player_df, ['hero', 'aspect']),
+            (self.scenarios, game_df, ['scenario']),
+            (self.player_counts, game_df, ['number_of_players']),
+        ]:
+            for key, n in _group_sizes(frame, cols).items():
+                counter[key if len(cols) > 1 else key[0]] += n
+
+        if not aspect_df.empty:
+            sums = aspect_df.groupby('individual_aspect', observed=True)['value'].sum()
+            for aspect, value in sums.items():
+                self.aspect_plays[aspect] += value
+
+    def _frame(self, name, build) -> pd.DataFrame:
+        # tabs only read the frames, so one copy serves every session
+        if name not in self._frames:
+            self._frames[name] = build()
+        return self._frames[name]
+
+    # Stats tab
+
+    @property
+    def distinct_players(self) -> int:
+        return len(self.names)
+
+    @property
+    def distinct_scenarios(self) -> int:
+        return sum(1 for scenario in self.scenarios if scenario is not None)
+
+    @property
+    def distinct_heroes(self) -> int:
+        return sum(1 for hero in self.heroes if hero is not None)
+
+    @property
+    def hero_aspect_combinations(self) -> int:
+        return len(self.hero_aspects)
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.game_rows if self.game_rows else 0.0
+
+    def player_count_games(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [(n, games) for n, games in self.player_counts.items() if n is not None],
+            columns=['number_of_players', 'games'])
+
+    # Aspects tab
+
+    def aspects_played(self) -> pd.DataFrame:
+        return pd.DataFrame(sorted(self.aspect_plays.items(), key=lambda item: str(item[0])),
+                            columns=['individual_aspect', 'plays'])
+
+    # Players tab
+
+    def games_played_by_name(self, top: int | None = None) -> pd.DataFrame:
+        """
+        Games per player, by name, or the `top` players with the most games.
+        """
+        plays = self._frame('games_played_by_name', lambda: pd.DataFrame(
+            sorted(((name, n) for name, n in self.names.items() if name is not None),
+                   key=lambda item: str(item[0])),
+            columns=['name', 'plays']))
+        return plays if top is None else plays.nlargest(top, 'plays')
+
+    def heroes_played_by_name(self, top: int | None = None) -> pd.DataFrame:
+        """
+        Distinct heroes per player, by name, or the `top` players with the
+        most heroes.
+        """
+        def build():
+            heroes = Counter(name for name, _ in self.name_heroes if name is not None)
+            return pd.DataFrame(sorted(heroes.items(), key=lambda item: str(item[0])),
+                                columns=['name', 'plays'])
+
+        plays = self._frame('heroes_played_by_name', build)
+        return plays if top is None else plays.nlargest(top, 'plays')
+
+    def deck_plays(self) -> pd.DataFrame:
+        """
+        Plays per (name, hero, aspect) deck, most played first, indexed by
+        rank from 1.
+        """
+        def build():
+            decks = pd.DataFrame(
+                sorted(((*deck, n) for deck, n in self.decks.items() if None not in deck),
+                       key=lambda item: tuple(map(str, item[:3]))),
+                columns=['name', 'hero', 'aspect', 'plays'])
+            decks = decks.sort_values('plays', ascending=False, kind='stable', ignore_index=True)
+            decks.index += 1
+            return decks
+
+        return self._frame('deck_plays', build)
+
+    def deck_search_text(self) -> pd.Series:
+        """
+        Lowercased 'name hero aspect' per row of `deck_plays`, for searching.
+        """
+        def build():
+            decks = self.deck_plays()
+            return (decks['name'].astype(str) + ' ' + decks['hero'].astype(str) + ' '
+                    + decks['aspect'].astype(str)).str.lower()
+
+        return self._frame('deck_search_text', build)
@@ -0,0 +1,155 @@
+import io
+import json
+import os
+import socket
+import time
+import uuid
+
+import pandas as pd
+
+from utils.snapshot_store import SnapshotStore
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+
+# renew the lease only while this replica still holds it, in one step, so a
+# lease that expired and was taken by another replica in between isn't
+# extended for the new leader
+_RENEW_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def _owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class FileSystemBackend:
+    """
+    Snapshots published to a directory, shared by every replica that can
+    reach it (a local directory for a single process, or a shared mount).
+
+    The replica holding an exclusive lock on `leader.lock` is the one that
+    polls the sheet and publishes; the lock is released by the OS when that
+    process exits, so another replica takes over on its next poll.
+    """
+
+    def __init__(self, directory: str, keep: int = 5):
+        self.store = SnapshotStore(directory, keep=keep)
+        self.owner = _owner_id()
+        self._lock_file = None
+
+    def acquire_leadership(self) -> bool:
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            # no advisory locks: every process refreshes on its own
+            return True
+
+        os.makedirs(self.store.directory, exist_ok=True)
+        lock_file = open(os.path.join(self.store.directory, "leader.lock"), "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        lock_file.truncate(0)
+        lock_file.write(self.owner)
+        lock_file.flush()
+        self._lock_file = lock_file
+        return True
+
+    def publish(self, version: str, frames: dict, meta: dict | None = None):
+        self.store.save(version, frames, meta)
+
+    def latest_manifest(self) -> dict | None:
+        return self.store.latest_manifest()
+
+    def load_latest(self):
+        return self.store.load_latest()
+
+
+class RedisBackend:
+    """
+    Snapshots published to Redis (or any server speaking its protocol), for
+    replicas that don't share a filesystem. Needs the optional `redis`
+    package.
+
+    Each frame is stored as Parquet bytes in a hash per version, the latest
+    manifest under `<namespace>:latest`, and leadership is a lease key that
+    the leader renews on every poll and that expires `lease` seconds after
+    it stops.
+    """
+
+    def __init__(self, url: str, namespace: str, keep: int = 5, lease: float = 90):
+        try:
+            import redis
+        except ImportError as err:
+            raise ImportError("The redis snapshot backend needs the 'redis' package: "
+                              "pip install redis") from err
+
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+        self.keep = keep
+        self.lease = lease
+        self.owner = _owner_id()
+        self._renew_lease = self.client.register_script(_RENEW_LEASE)
+
+    def _key(self, *parts) -> str:
+        return ":".join((self.namespace, *parts))
+
+    def acquire_leadership(self) -> bool:
+        key = self._key("leader")
+        lease_ms = int(self.lease * 1000)
+
+        if self.client.set(key, self.owner, nx=True, px=lease_ms):
+            return True
+
+        # renew our own lease
+        return bool(self._renew_lease(keys=[key], args=[self.owner, lease_ms]))
+
+    def publish(self, version: str, frames: dict, meta: dict | None = None):
+        manifest = {"version": version,
+                    "saved_at": time.time(),
+                    "frames": list(frames),
+                    **(meta or {})}
+
+        payload = {}
+        for name, df in frames.items():
+            buffer = io.BytesIO()
+            df.to_parquet(buffer)
+            payload[name] = buffer.getvalue()
+
+        pipe = self.client.pipeline()
+        pipe.hset(self._key("snapshot", version), mapping=payload)
+        pipe.set(self._key("latest"), json.dumps(manifest))
+        pipe.lrem(self._key("versions"), 0, version)
+        pipe.lpush(self._key("versions"), version)
+        pipe.lrange(self._key("versions"), self.keep, -1)
+        pipe.ltrim(self._key("versions"), 0, self.keep - 1)
+        expired = pipe.execute()[4]
+
+        if expired:
+            self.client.delete(*(self._key("snapshot", v.decode()) for v in expired))
+
+    def latest_manifest(self) -> dict | None:
+        manifest = self.client.get(self._key("latest"))
+        return None if manifest is None else json.loads(manifest)
+
+    def load_latest(self):
+        manifest = self.latest_manifest()
+        if manifest is None:
+            return None
+
+        stored = self.client.hgetall(self._key("snapshot", manifest["version"]))
+        frames = {name: pd.read_parquet(io.BytesIO(stored[name.encode()]))
+                  for name in manifest["frames"]}
+
+        return manifest, frames
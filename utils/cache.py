@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+
+
+class SnapshotCache:
+    """
+    Process-wide cache shared by every Streamlit session.
+
+    Values are keyed by what they were built from (e.g. a data version), so
+    they never expire. Exactly one caller runs the loader for a missing key
+    (single-flight); concurrent callers wait for it instead of starting their
+    own. At most `max_entries` values are kept, least recently used are
+    evicted first.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """
+        Return the cached value for `key`, calling `loader()` when it is
+        missing.
+        """
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+
+                if key in self._inflight:
+                    done = self._inflight[key]
+                else:
+                    done = self._inflight[key] = threading.Event()
+                    break
+
+            # wait for the in-flight load and retry; if it failed, this
+            # caller loads next
+            done.wait()
+
+        try:
+            value = loader()
+            with self._lock:
+                self._store(key, value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+        return value
+
+    def seed(self, key, value):
+        """
+        Store a value obtained elsewhere unless the key is already cached.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self._store(key, value)
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
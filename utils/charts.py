@@ -1,23 +1,145 @@
-import altair as alt
+import functools
+import hashlib
+import logging
+import weakref
+from collections import namedtuple
+
 import pandas as pd
 import streamlit as st
+from utils import config
+from utils.cache import SnapshotCache
+from utils.profiling import instrument, span
+from utils.reference import REFERENCE
 
-# create custom color schemes referenced throughout
-color_scheme_map = {
-    'aspect' : alt.Scale(
-    domain=["Aggression", "Basic", "Justice", "Leadership",
-            "Pool", "Protection", "Other"],
-    range=['#FF4500', 'lightgrey', '#FFD700', '#0086EB',
-           'pink', '#00C853', 'darkgrey']),
-    
-    'scenario' : alt.Scale(
-    domain=['Win', 'Loss'],
-    range=['#518cca', '#f78f3f'])
+logger = logging.getLogger(__name__)
+
+# Altair is imported by the builders on first use rather than here, so
+# starting the app and drawing cached specs doesn't pay for importing it
+
+# custom color schemes referenced throughout, from the reference data
+COLOR_SCHEMES = {
+    'aspect': REFERENCE.aspect_colors,
+    'scenario': REFERENCE.outcome_colors,
     }
 
 
+@functools.cache
+def color_scale(scheme: str):
+    """
+    alt.Scale mapping each value of a COLOR_SCHEMES entry to its color.
+    """
+    import altair as alt
+
+    colors = COLOR_SCHEMES[scheme]
+    return alt.Scale(domain=list(colors), range=list(colors.values()))
+
+
+# Streamlit releases whose private Altair to Vega-Lite conversion (data as
+# Arrow, the way st.altair_chart sends it) has been checked: at least the
+# first, below the second. Other releases cache Altair's own spec with the
+# data inline, which is larger but drawn the same way
+_SPEC_STREAMLIT_VERSIONS = ((1, 53), (1, 54))
+
+
+def _inline_spec(chart) -> dict:
+    return chart.to_dict()
+
+
+def _spec_converter():
+    version = tuple(int(part) for part in st.__version__.split(".")[:2])
+    low, high = _SPEC_STREAMLIT_VERSIONS
+    if low <= version < high:
+        try:
+            from streamlit.elements.vega_charts import _convert_altair_to_vega_lite_spec
+            return _convert_altair_to_vega_lite_spec
+        except ImportError:
+            pass
+    logger.info("Caching chart specs with inline data on Streamlit %s", st.__version__)
+    return _inline_spec
+
+
+_to_spec = _spec_converter()
+
+# Vega-Lite specs by (data key, builder, arguments), shared by every session
+_spec_cache = SnapshotCache(max_entries=config.CHART_CACHE_ENTRIES)
+
+# content hashes of frames by id, so a frame drawn on every rerun is only
+# hashed once; entries go when their frame is garbage collected
+_fingerprints = {}
+
+
+def _fingerprint(frame) -> str:
+    entry = _fingerprints.get(id(frame))
+    if entry is not None and entry[0]() is frame:
+        return entry[1]
+
+    hashes = pd.util.hash_pandas_object(frame, index=True).to_numpy()
+    digest = hashlib.blake2b(hashes.tobytes(), digest_size=8)
+    digest.update(repr(list(frame.columns) if isinstance(frame, pd.DataFrame)
+                       else frame.name).encode())
+
+    key = id(frame)
+    _fingerprints[key] = (weakref.ref(frame, lambda _: _fingerprints.pop(key, None)),
+                          digest.hexdigest())
+    return _fingerprints[key][1]
+
+
+def _freeze(value):
+    # hashable stand-in for a chart argument; frames are identified by a
+    # hash of their contents, so two charts of the same data key and shape
+    # never share a spec
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return (type(value).__name__, value.shape, _fingerprint(value))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def chart_spec(data_key, builder, *args, **kwargs) -> dict:
+    """
+    Vega-Lite spec of `builder(*args, **kwargs)`, with the data already
+    serialized the way st.altair_chart does it, or inline on Streamlit
+    releases that conversion isn't checked against.
+
+    `data_key` scopes the cached specs, e.g. to the data version and
+    region, so each chart is built once per data version and later calls
+    reuse the spec. None builds it every time.
+    """
+    if data_key is None:
+        return _to_spec(builder(*args, **kwargs))
+
+    key = (data_key, builder.__name__, _freeze(args), _freeze(kwargs))
+    return _spec_cache.get(key, lambda: _to_spec(builder(*args, **kwargs)))
+
+
+def show_chart(data_key, builder, *args, display_width="stretch", **kwargs):
+    """
+    Draw `builder(*args, **kwargs)` like st.altair_chart, from the cached
+    spec when `data_key` was drawn before. `display_width` is passed as
+    st.vega_lite_chart's width ("stretch" or "content"), since `width` is
+    the builders' own.
+    """
+    spec = chart_spec(data_key, builder, *args, **kwargs)
+    with span(f"chart.show.{builder.__name__}"):
+        # vega_lite_chart works on a shallow copy of the spec
+        return st.vega_lite_chart(spec=spec, width=display_width)
+
+
+# one chart of a view: the show_chart arguments and the heading it's shown
+# under, so the tabs and the kiosk export build the same (cached) spec
+ChartView = namedtuple('ChartView', ['heading', 'data_key', 'builder', 'args', 'kwargs'])
+
+
+def draw(chart: ChartView, display_width="stretch"):
+    return show_chart(chart.data_key, chart.builder, *chart.args,
+                      display_width=display_width, **chart.kwargs)
+
+
+@instrument("chart.donut_chart")
 def donut_chart(df: pd.DataFrame, category_col: str, value_col: str = None,
-                title: str = "", colorScheme = None) -> alt.Chart:
+                title: str = "", colorScheme = None) -> "alt.Chart":
     """
     Create a donut chart in Altair.
 
@@ -39,25 +161,26 @@ def donut_chart(df: pd.DataFrame, category_col: str, value_col: str = None,
     alt.Chart
         Donut chart as an Altair object
     """
+    import altair as alt
 
     # If no value column, count occurrences
     if value_col is None:
-        df_plot = df.groupby(category_col).size().reset_index(name="count")
+        df_plot = df.groupby(category_col, observed=True).size().reset_index(name="count")
         value_col = "count"
     else:
-        df_plot = df.groupby(category_col)[value_col].sum().reset_index()
+        df_plot = df.groupby(category_col, observed=True)[value_col].sum().reset_index()
 
     # Compute angles
     df_plot["angle"] = df_plot[value_col] / df_plot[value_col].sum()
 
-    if colorScheme not in color_scheme_map:
+    if colorScheme not in COLOR_SCHEMES:
         color_encoding = alt.Color(f"{category_col}:N",
                                    legend=alt.Legend(title=category_col, orient='bottom-right'))
 
     else:
         color_encoding = alt.Color(
             f"{category_col}:N",
-            scale=color_scheme_map[colorScheme],
+            scale=color_scale(colorScheme),
             legend=None)
             
     pie = (
@@ -74,6 +197,55 @@ def donut_chart(df: pd.DataFrame, category_col: str, value_col: str = None,
     return pie
 
 
+def _is_count(shorthand) -> bool:
+    return shorthand is None or (isinstance(shorthand, str) and shorthand.lower() == "count")
+
+
+def _field(shorthand: str) -> str:
+    # 'hero:N' -> 'hero'
+    return shorthand.split(':')[0]
+
+
+def aggregate_bars(df: pd.DataFrame, x=None, y=None, color=None) -> pd.DataFrame:
+    """
+    Group row-level data down to one row per bar segment for bar_chart.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Row-level dataframe
+    x, y : str, optional
+        bar_chart encodings. The count axis ('count' or None) becomes a
+        'count' column of row counts; otherwise x is the measure and is
+        summed per y category (horizontal bars, as bar_chart draws them)
+    color : str, optional
+        Column the bars are split/colored by, kept as a grouping key
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per (category, color) with the bar value
+    """
+    if _is_count(x):
+        category, measure = y, None
+    elif _is_count(y):
+        category, measure = x, None
+    else:
+        category, measure = y, x
+
+    keys = [_field(category)]
+    if color is not None and _field(color) not in keys:
+        keys.append(_field(color))
+
+    grouped = df.groupby(keys, dropna=False, observed=True, sort=False)
+
+    if measure is None:
+        return grouped.size().reset_index(name='count')
+
+    return grouped[_field(measure)].sum().reset_index()
+
+
+@instrument("chart.bar_chart")
 def bar_chart(df: pd.DataFrame,
               x=None,
               y=None,
@@ -83,17 +255,33 @@ def bar_chart(df: pd.DataFrame,
               text=None,
               height=600,
               width=300,
-              title=None):
+              title=None,
+              aggregate=False):
+    """
+    Create a bar chart in Altair.
+
+    Pass 'count' (or None) for x or y to count rows per category. With
+    aggregate=True the data is grouped to one row per (category, color)
+    before the spec is built, so the embedded data grows with the number
+    of distinct categories instead of the number of rows.
+    """
+    import altair as alt
+
+    # group server side so the spec only ships the bar values
+    if aggregate:
+        df = aggregate_bars(df, x, y, color)
+        count_field = 'count:Q'
+    else:
+        count_field = 'count()'
 
-    
     # Handle y-axis: count if None or 'count'
-    if y is None or (isinstance(y, str) and y.lower() == "count"):
-        y_enc = alt.Y('count()', title='Count', axis=alt.Axis(format='d', title=""))
+    if _is_count(y):
+        y_enc = alt.Y(count_field, title='Count', axis=alt.Axis(format='d', title=""))
     else:
         y_enc = alt.Y(y, title=str(y), axis=alt.Axis(labelLimit=300, title=""), sort='-x')
 
-    if x is None or (isinstance(x, str) and x.lower() == "count"):
-        x_enc = alt.X('count()', title='Count', axis=alt.Axis(format='d', title=""))
+    if _is_count(x):
+        x_enc = alt.X(count_field, title='Count', axis=alt.Axis(format='d', title=""))
     else:
         x_enc = alt.X(x, title=str(x), axis=alt.Axis(labelLimit=300, title=""), sort='-y')
     
@@ -109,12 +297,12 @@ def bar_chart(df: pd.DataFrame,
 
     elif color is not None and colorScheme == 'aspect':
         encodings['color'] = alt.Color(color, title=str(color),
-                                       scale=color_scheme_map[colorScheme],
+                                       scale=color_scale(colorScheme),
                                        legend=alt.Legend(orient='bottom'))
     
     elif color is not None and colorScheme == 'scenario':
         encodings['color'] = alt.Color(color, title=str(color),
-                                       scale=color_scheme_map[colorScheme],
+                                       scale=color_scale(colorScheme),
                                        legend=alt.Legend(orient='bottom'))
 
 
@@ -141,8 +329,38 @@ def bar_chart(df: pd.DataFrame,
         return chart
     
 
+@instrument("chart.line_chart")
+def line_chart(df: pd.DataFrame, x: str, y: str, *, color=None, colorScheme=None,
+               height=300, width=600, title=None):
+    """
+    Create a line chart in Altair, e.g. counts per time bucket, with one
+    line per value of `color`.
+    """
+    import altair as alt
+
+    encodings = {
+        "x": alt.X(x, title=""),
+        "y": alt.Y(y, title=""),
+        "tooltip": [alt.Tooltip(x), alt.Tooltip(y)],
+    }
+
+    if color is not None:
+        scale = {'scale': color_scale(colorScheme)} if colorScheme in COLOR_SCHEMES else {}
+        encodings["color"] = alt.Color(color, title=str(color),
+                                       legend=alt.Legend(orient='bottom'), **scale)
+        encodings["tooltip"].append(alt.Tooltip(color))
+
+    return alt.Chart(df).mark_line(point=True).encode(**encodings).properties(
+        height=height,
+        width=width,
+        title=title
+    )
+
+
+@instrument("chart.heatmap_chart")
 def heatmap_chart(df, x:str, y:str, color:str,
                   x_title:str, y_title:str, color_title:str):
+    import altair as alt
 
     heatmap = (
         alt.Chart(df)
@@ -0,0 +1,70 @@
+import os
+
+# seconds between polls of the sheet by the background refresher
+REFRESH_INTERVAL_SECONDS = float(os.environ.get("MCDC_REFRESH_INTERVAL", 30))
+
+# seconds between each browser session's check for a new data version; the
+# check is a tiny fragment rerun, the full page only reruns on a change
+CHANGE_POLL_SECONDS = float(os.environ.get("MCDC_CHANGE_POLL", 5))
+
+# seconds a request for the sheet may wait for the server before it fails and
+# the refresher retries with backoff
+FETCH_TIMEOUT_SECONDS = float(os.environ.get("MCDC_FETCH_TIMEOUT", 30))
+
+# seconds a page load waits for the first data before showing a notice
+# instead; the page retries on the next change poll
+FIRST_LOAD_TIMEOUT_SECONDS = float(os.environ.get("MCDC_FIRST_LOAD_TIMEOUT", 60))
+
+# longest wait between retries while the sheet keeps failing
+REFRESH_MAX_BACKOFF_SECONDS = float(os.environ.get("MCDC_REFRESH_MAX_BACKOFF", 300))
+
+# number of data versions whose per-region pipeline outputs stay in memory
+PIPELINE_CACHE_ENTRIES = int(os.environ.get("MCDC_PIPELINE_CACHE_ENTRIES", 3))
+
+# rows parsed at a time when ingesting the sheet; bounds parsing memory
+INGEST_CHUNK_ROWS = int(os.environ.get("MCDC_INGEST_CHUNK_ROWS", 50_000))
+
+# show the admin panel (rows rejected by ingest validation)
+ADMIN = os.environ.get("MCDC_ADMIN", "").lower() in ("1", "true")
+
+# local Parquet copies of the latest ingested data, used for instant cold
+# starts and when the sheet is unreachable; empty disables the store
+SNAPSHOT_DIR = os.environ.get("MCDC_SNAPSHOT_DIR", ".snapshots")
+
+# number of snapshots kept on disk per sheet
+SNAPSHOT_RETENTION = int(os.environ.get("MCDC_SNAPSHOT_RETENTION", 5))
+
+# where replicas publish and pick up snapshots: "filesystem" uses SNAPSHOT_DIR
+# (point it at a shared mount for several replicas), "redis" uses REDIS_URL
+SNAPSHOT_BACKEND = os.environ.get("MCDC_SNAPSHOT_BACKEND", "filesystem").lower()
+
+# server for the "redis" snapshot backend
+REDIS_URL = os.environ.get("MCDC_REDIS_URL", "redis://localhost:6379/0")
+
+# serialized chart specs kept in memory, shared by every session
+CHART_CACHE_ENTRIES = int(os.environ.get("MCDC_CHART_CACHE_ENTRIES", 256))
+
+# heroes, aspects, colors and aliases; new heroes are added there
+REFERENCE_PATH = os.environ.get(
+    "MCDC_REFERENCE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "reference.json"))
+
+# width of the time buckets submissions are counted in for the Trends tab,
+# and how many hours of buckets are kept; older buckets are dropped
+ACTIVITY_BUCKET_MINUTES = int(os.environ.get("MCDC_ACTIVITY_BUCKET_MINUTES", 15))
+ACTIVITY_RETENTION_HOURS = float(os.environ.get("MCDC_ACTIVITY_RETENTION_HOURS", 96))
+
+# directory the kiosk export writes standalone HTML and Vega-Lite JSON of
+# every view to, once per data version, for displays that only watch;
+# empty disables the export
+EXPORT_DIR = os.environ.get("MCDC_EXPORT_DIR", "")
+
+# render only the selected view instead of every st.tabs body on each rerun
+LAZY_TABS = os.environ.get("MCDC_LAZY_TABS", "1").lower() not in ("0", "false")
+
+# "1" records timing spans for the pipeline, charts and tabs, "memory" also
+# traces allocations (slow); anything else leaves profiling compiled out
+PROFILE = os.environ.get("MCDC_PROFILE", "").lower()
+
+# most recent profiling spans kept for the debug panel
+PROFILE_MAX_RECORDS = int(os.environ.get("MCDC_PROFILE_MAX_RECORDS", 2000))
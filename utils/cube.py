@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# dimensions of the cube, game dimensions first
+DIMENSIONS = ['region', 'scenario', 'difficulty', 'number_of_players', 'skirmish_mode',
+              'hero', 'individual_aspect']
+
+# additive measures per cell: exploded aspect rows, weighted plays (each
+# player entry adds up to 1 over its aspects) and weighted wins
+MEASURES = ['count', 'plays', 'wins']
+
+# largest rollup computed on a dense array of every combination
+_DENSE_KEYS = 1 << 20
+
+
+class Cube:
+    """
+    Counts, weighted plays and weighted wins per combination of DIMENSIONS,
+    materialized once per data version so breakdowns never rescan rows.
+
+    Each dimension is stored as integer codes into its levels, with 0 for
+    missing values and level i at code i + 1, and `query` filters and rolls
+    up the cells with numpy lookups and bincount.
+    """
+
+    def __init__(self, levels: dict, codes: dict, measures: dict):
+        self._levels = levels
+        self._codes = codes
+        self._measures = measures
+
+    @classmethod
+    def from_frames(cls, game_df: pd.DataFrame, aspect_df: pd.DataFrame) -> "Cube":
+        """
+        Build the cube from the pipeline's game and exploded aspect frames.
+        Player entries without an aspect count as one play.
+        """
+        game_dims = [dim for dim in DIMENSIONS if dim in game_df.columns]
+        facts = aspect_df[['submission_id', 'hero', 'individual_aspect', 'value']].merge(
+            game_df[['submission_id', 'outcome', *game_dims]], how='left', on='submission_id')
+
+        weights = facts['value'].fillna(1.0).to_numpy(dtype=float)
+        won = (facts['outcome'] == 'Win').to_numpy()
+
+        # one row per distinct combination of dimensions
+        groups = pd.DataFrame({dim: facts[dim] for dim in DIMENSIONS})
+        cells = (groups.assign(count=1.0, plays=weights, wins=weights * won)
+                 .groupby(DIMENSIONS, observed=True, dropna=False, sort=False)[MEASURES]
+                 .sum()
+                 .reset_index())
+
+        levels, codes = {}, {}
+        for dim in DIMENSIONS:
+            # as objects, since sorting a categorical follows its category
+            # order rather than the values
+            dim_codes, dim_levels = pd.factorize(cells[dim].astype(object), sort=True)
+            codes[dim] = (dim_codes + 1).astype(np.int32)
+            levels[dim] = np.asarray(dim_levels, dtype=object)
+
+        measures = {measure: cells[measure].to_numpy() for measure in MEASURES}
+        return cls(levels, codes, measures)
+
+    def __len__(self) -> int:
+        return len(self._measures['count'])
+
+    def levels(self, dim: str) -> list:
+        """
+        Values of a dimension present in the data, sorted.
+        """
+        return self._levels[dim].tolist()
+
+    def query(self, by=(), where: dict | None = None) -> pd.DataFrame:
+        """
+        Roll the cube up to the dimensions in `by`, keeping only cells whose
+        dimension values are in `where` ({dim: value or list of values}).
+
+        Returns one row per combination of `by` that has plays, with the
+        measures and `win_rate` = wins / plays.
+        """
+        by = list(by)
+        rows = slice(None)
+
+        if where:
+            mask = np.ones(len(self), dtype=bool)
+            for dim, values in where.items():
+                if not isinstance(values, (list, tuple, set)):
+                    values = [values]
+                # lookup table of allowed codes, indexed by each cell's code
+                allowed = np.append(False, np.isin(self._levels[dim], list(values)))
+                mask &= allowed[self._codes[dim]]
+            rows = np.flatnonzero(mask)
+
+        sizes = [len(self._levels[dim]) + 1 for dim in by]
+        if by:
+            keys = np.ravel_multi_index([self._codes[dim][rows] for dim in by], sizes)
+        else:
+            keys = np.zeros(len(self._measures['count'][rows]), dtype=np.int64)
+
+        n_keys = int(np.prod(sizes)) if by else 1
+        key_values = None
+        if n_keys > _DENSE_KEYS:
+            # too many combinations for a dense array, number the ones present
+            key_values, keys = np.unique(keys, return_inverse=True)
+            n_keys = len(key_values)
+
+        sums = {measure: np.bincount(keys, weights=values[rows], minlength=n_keys)
+                for measure, values in self._measures.items()}
+
+        present = np.flatnonzero(sums['count'] > 0)
+        flat_keys = present if key_values is None else key_values[present]
+
+        result = {}
+        for dim, dim_codes in zip(by, np.unravel_index(flat_keys, sizes) if by else []):
+            labels = np.append(np.array([None], dtype=object), self._levels[dim])
+            result[dim] = labels[dim_codes]
+        for measure in MEASURES:
+            result[measure] = sums[measure][present]
+        result['win_rate'] = result['wins'] / result['plays']
+
+        return pd.DataFrame(result)
@@ -1,33 +1,456 @@
 import pandas as pd
 import numpy as np
-import streamlit as st
+import hashlib
+import logging
+import os
 import re
-
+import threading
+import time
+from collections import namedtuple
+from pandas.api.types import union_categoricals
+from utils import config
+from utils.activity import ActivityBuckets
+from utils.aggregates import RunningAggregates
+from utils.backends import FileSystemBackend, RedisBackend
+from utils.cache import SnapshotCache
+from utils.cube import Cube
+from utils.ingest import IncrementalSheetLoader
+from utils.profiling import instrument, span
+from utils.reference import REFERENCE
+from utils.refresher import Refresher
+
+logger = logging.getLogger(__name__)
+
+# a loaded copy of the sheet; version is a content hash of the export. When
+# the load only appended rows, base_version is the version appended to and
+# appended_from the index of the first new row in df. rejected holds the
+# rows that failed validation, with their sheet row and the reason
+Snapshot = namedtuple('Snapshot', ['version', 'df', 'loaded_at', 'source',
+                                   'base_version', 'appended_from', 'rejected'],
+                      defaults=(None, None, None))
+
+# what the app renders from a snapshot: run_data_pipeline outputs and
+# leaderboard aggregates, each keyed by region with 'All' first, and the
+# win-rate cube and time-bucketed activity over all regions
+DataViews = namedtuple('DataViews', ['regions', 'aggregates', 'cube', 'activity'])
+
+# names of the run_data_pipeline outputs, in order
+PIPELINE_FRAMES = ['game_df', 'player_df', 'aspect_df', 'heatmap_df', 'full_df']
+
+# known domains for the heatmap and the categorical schema, from the
+# reference data file
+ASPECT_LIST = REFERENCE.aspects
+
+HERO_LIST = REFERENCE.heroes
+
+# features stored as pandas categoricals, with known categories listed
+# first; values outside them are added as extra categories at load time
+CATEGORICAL_DOMAINS = {
+    'region': [],
+    'scenario': [],
+    'difficulty': [],
+    'skirmish_mode': [],
+    'outcome': ['Win', 'Loss'],
+    'name': [],
+    'hero': HERO_LIST,
+    'aspect': ASPECT_LIST,
+    'multi_aspect': [],
+}
+
+# alternative spellings mapped to the reference name before categorizing
+CATEGORICAL_ALIASES = {
+    'hero': REFERENCE.hero_aliases,
+}
+
+# whole-number columns, read as text and checked by validate_rows rather
+# than left to read_csv's type inference
+INTEGER_COLUMNS = ['number_of_players']
+
+# columns a submission can't be used without
+REQUIRED_COLUMNS = ['submission_id', 'submission_time', 'number_of_players']
+
+# bumped when a change to the pipeline changes its outputs
+PIPELINE_VERSION = 2
+
+# what the pipeline outputs depend on besides the sheet: the pipeline code
+# and the reference data. Snapshots and cached outputs are only reused when
+# it matches, so a new hero in the reference file isn't hidden by outputs
+# built without it
+PIPELINE_FINGERPRINT = f"{PIPELINE_VERSION}-{REFERENCE.fingerprint}"
+
+# shared by every session in the process
+_pipeline_cache = SnapshotCache(max_entries=config.PIPELINE_CACHE_ENTRIES)
+
+@instrument("pipeline.run_data_pipeline")
 def run_data_pipeline(df):
-    
-    game_df = df[['submission_id', 'submission_time', 'region', 'number_of_players',
-              'scenario', 'difficulty', 'skirmish_mode', 'outcome']].copy().drop_duplicates()
+
+    game_df, player_df, aspect_df = build_frames(df)
+
+    unknown = unknown_heroes(player_df)
+    if len(unknown):
+        logger.warning("Heroes missing from the reference data, left out of the heatmap: %s",
+                       ", ".join(unknown['hero']))
+
+    heatmap_df = get_heatmap_data(aspect_df[['hero', 'individual_aspect', 'value']])
+
+    with span("pipeline.full_merge", rows_in=len(player_df)) as s:
+        full_df = pd.merge(player_df, game_df, how='left', on='submission_id')
+        s.rows_out = len(full_df)
+
+    return game_df, player_df, aspect_df, heatmap_df, full_df
+
+
+def build_frames(df):
+    """
+    The per-game, per-player and per-aspect frames the rest of the pipeline
+    and the aggregates are built from.
+    """
+    with span("pipeline.game_df", rows_in=len(df)) as s:
+        game_df = df[['submission_id', 'submission_time', 'region', 'number_of_players',
+                  'scenario', 'difficulty', 'skirmish_mode', 'outcome']].copy().drop_duplicates()
+        s.rows_out = len(game_df)
     
     player_df = reshape_players(df)
 
     player_df = merge_aspects(player_df)
 
-    aspect_df = explode_with_weights(player_df, 'aspect', 'individual_aspect')
+    # the heroes tab, heatmap, aggregates and region split only need these
+    aspect_df = explode_with_weights(player_df, 'aspect', 'individual_aspect',
+                                     columns=['submission_id', 'player_num', 'hero'])
     aspect_df = replace_with_other(aspect_df,
-                                   allowed_set = set(['Aggression', 'Basic', 'Leadership', 'Justice', 'Pool', 'Protection']),
+                                   allowed_set = REFERENCE.aspect_set,
                                    col='individual_aspect')
-    
-    heatmap_df = get_heatmap_data(aspect_df[['hero', 'individual_aspect', 'value']])
 
-    full_df = pd.merge(player_df, game_df, how='left', on='submission_id')
+    return game_df, player_df, aspect_df
 
-    return game_df, player_df, aspect_df, heatmap_df, full_df
 
+# one incremental loader per sheet location, shared by every session
+_loaders = {}
+_loaders_lock = threading.Lock()
 
-def load_data():
-    df = pd.read_csv(st.secrets["sheets"]["spreadsheet"])
-    df = normalize_column_names(df)
-    return df
+
+def get_loader(location: str) -> IncrementalSheetLoader:
+    with _loaders_lock:
+        if location not in _loaders:
+            _loaders[location] = IncrementalSheetLoader(
+                location, normalize=normalize_column_names, schema=apply_schema,
+                dtypes=column_dtypes, validate=validate_rows,
+                chunk_size=config.INGEST_CHUNK_ROWS)
+        return _loaders[location]
+
+
+@instrument("load_data")
+def fetch_snapshot(location: str) -> Snapshot:
+    loader = get_loader(location)
+    df = loader.load()
+    return Snapshot(loader.version, df, time.time(), location,
+                    loader.base_version, loader.appended_from, loader.rejected)
+
+
+# one snapshot backend per sheet location, so leadership is held for the
+# life of the process
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(location: str):
+    """
+    Return the snapshot backend for a sheet, or None when snapshots are
+    disabled. Each sheet gets its own directory or key namespace so
+    switching sheets never serves the old one.
+    """
+    key = hashlib.blake2b(location.encode(), digest_size=6).hexdigest()
+
+    with _backends_lock:
+        if key not in _backends:
+            if config.SNAPSHOT_BACKEND == "redis":
+                _backends[key] = RedisBackend(config.REDIS_URL, f"mcdc:{key}",
+                                              keep=config.SNAPSHOT_RETENTION)
+            elif config.SNAPSHOT_BACKEND == "filesystem":
+                _backends[key] = (FileSystemBackend(os.path.join(config.SNAPSHOT_DIR, key),
+                                                    keep=config.SNAPSHOT_RETENTION)
+                                  if config.SNAPSHOT_DIR else None)
+            else:
+                raise ValueError(f"Unknown snapshot backend: {config.SNAPSHOT_BACKEND!r}")
+        return _backends[key]
+
+
+def persist_snapshot(snapshot: Snapshot, outputs):
+    """
+    Publish the sheet and its pipeline outputs to the snapshot backend on a
+    background thread. Only the leader publishes; other replicas load what
+    it published. A failing backend only costs the published copy.
+    """
+    try:
+        backend = get_backend(snapshot.source)
+        if backend is None or not backend.acquire_leadership():
+            return
+    except Exception as err:
+        logger.warning("Snapshot backend unavailable, not publishing %s: %s",
+                       snapshot.version, err)
+        return
+
+    frames = {'sheet': snapshot.df, **dict(zip(PIPELINE_FRAMES, outputs))}
+    if snapshot.rejected is not None:
+        frames['rejected'] = snapshot.rejected
+    meta = {'loaded_at': snapshot.loaded_at,
+            'base_version': snapshot.base_version,
+            'appended_from': snapshot.appended_from,
+            'pipeline': PIPELINE_FINGERPRINT}
+
+    def save():
+        try:
+            backend.publish(snapshot.version, frames, meta)
+        except Exception:
+            logger.exception("Publishing snapshot %s failed", snapshot.version)
+
+    threading.Thread(target=save, daemon=True).start()
+
+
+def restore_snapshot(location: str) -> Snapshot | None:
+    """
+    Load the newest published snapshot for a sheet and seed the pipeline
+    cache with its outputs, so rendering it needs no fetch or transform.
+    Snapshots built by another pipeline version or reference data file are
+    skipped, and a failing backend means starting without one.
+    """
+    try:
+        backend = get_backend(location)
+        return _load_published(backend, location) if backend is not None else None
+    except Exception:
+        logger.exception("Restoring the latest snapshot failed, starting without one")
+        return None
+
+
+def _load_published(backend, location: str) -> Snapshot | None:
+    stored = backend.load_latest()
+    if stored is None:
+        return None
+
+    manifest, frames = stored
+    if manifest.get('pipeline') != PIPELINE_FINGERPRINT:
+        logger.info("Skipping snapshot %s built by pipeline %s, this is %s",
+                    manifest['version'], manifest.get('pipeline'), PIPELINE_FINGERPRINT)
+        return None
+
+    snapshot = Snapshot(manifest['version'], frames['sheet'], manifest['loaded_at'], location,
+                        manifest.get('base_version'), manifest.get('appended_from'),
+                        frames.get('rejected'))
+    outputs = tuple(frames[name] for name in PIPELINE_FRAMES)
+    _pipeline_cache.seed(('pipeline', snapshot.version, PIPELINE_FINGERPRINT),
+                         split_by_region(outputs))
+
+    return snapshot
+
+
+def sync_snapshot(location: str, current_version: str | None = None) -> Snapshot | None:
+    """
+    Fetch for the refresher. The leader replica reads the sheet itself;
+    the others only check the backend for a version other than the one
+    they have, and load it, pipeline outputs included, when there is one.
+    Returns None when there is nothing new.
+
+    The backend only saves work: when it fails, the sheet is read directly.
+    """
+    try:
+        backend = get_backend(location)
+        if backend is not None and not backend.acquire_leadership():
+            manifest = backend.latest_manifest()
+            if manifest is None or manifest['version'] == current_version:
+                return None
+
+            snapshot = _load_published(backend, location)
+            # with nothing usable published yet, e.g. by a leader still
+            # running another pipeline version, load the sheet directly
+            if snapshot is not None or current_version is not None:
+                return snapshot
+    except Exception as err:
+        logger.warning("Snapshot backend unavailable, loading the sheet directly: %s", err)
+
+    return fetch_snapshot(location)
+
+
+# one background refresher per sheet location, started on first use
+_refreshers = {}
+_refreshers_lock = threading.Lock()
+
+
+def get_refresher(location: str) -> Refresher:
+    """
+    Return the running refresher for a sheet. It starts from the newest
+    published snapshot when there is one, then polls the sheet and runs
+    the pipeline off the render path, or on follower replicas polls the
+    snapshot backend for what the leader published.
+    """
+    with _refreshers_lock:
+        if location not in _refreshers:
+            _refreshers[location] = Refresher(
+                fetch=lambda version: sync_snapshot(location, version),
+                transform=build_views,
+                interval=config.REFRESH_INTERVAL_SECONDS,
+                max_backoff=config.REFRESH_MAX_BACKOFF_SECONDS,
+                initial=restore_snapshot(location)
+            ).start()
+        return _refreshers[location]
+
+
+def _split_frames(game_df, player_df, aspect_df) -> dict:
+    # per-region (game, player, aspect) frames for the regions in game_df
+    split = {}
+    for region in game_df['region'].unique():
+        region_games = game_df[game_df['region']==region]
+        ids = region_games['submission_id']
+        split[region] = (region_games,
+                         player_df[player_df['submission_id'].isin(ids)],
+                         aspect_df[aspect_df['submission_id'].isin(ids)])
+    return split
+
+
+def appended_frames(snapshot: Snapshot, previous=None):
+    """
+    build_frames of just the rows a snapshot appended to the previous
+    (snapshot, DataViews), or None when it isn't an append to it.
+    """
+    if (previous is not None and snapshot.appended_from is not None
+            and snapshot.base_version == previous[0].version):
+        return build_frames(snapshot.df.iloc[snapshot.appended_from:])
+    return None
+
+
+@instrument("pipeline.aggregates")
+def build_aggregates(region_outputs: dict, previous=None, appended=None) -> dict:
+    """
+    Leaderboard aggregates for 'All' and every region of a snapshot.
+
+    When the snapshot only appended rows to the previous one, the
+    `appended_frames` of the new rows are added to the previous aggregates;
+    otherwise they are rebuilt from the region outputs.
+    """
+    if appended is not None:
+        aggregates = dict(previous[1].aggregates)
+        game_df, player_df, aspect_df = appended
+
+        aggregates['All'] = aggregates['All'].advanced(game_df, player_df, aspect_df)
+        for region, frames in _split_frames(game_df, player_df, aspect_df).items():
+            base = aggregates.get(region) or RunningAggregates()
+            aggregates[region] = base.advanced(*frames)
+
+        return {region: aggregates[region] for region in region_outputs
+                if region in aggregates}
+
+    return {region: RunningAggregates.from_frames(*outputs[:3])
+            for region, outputs in region_outputs.items()}
+
+
+def build_views(snapshot: Snapshot, previous=None) -> DataViews:
+    """
+    Everything the app renders for a snapshot. `previous` is the last
+    (snapshot, DataViews) built, used to update the aggregates and activity
+    buckets incrementally.
+    """
+    region_outputs = get_region_outputs(snapshot)
+    appended = appended_frames(snapshot, previous)
+    views = DataViews(region_outputs,
+                      build_aggregates(region_outputs, previous, appended),
+                      build_cube(region_outputs),
+                      build_activity(region_outputs, previous, appended))
+    export_views(snapshot, views)
+    return views
+
+
+# newest version handed to export_views; exports run one at a time and a
+# version superseded while waiting is skipped
+_export_state = {'latest': None}
+_export_lock = threading.Lock()
+
+
+def export_views(snapshot: Snapshot, views: DataViews):
+    """
+    Write the kiosk export of a data version (see utils.kiosk) on a
+    background thread, when MCDC_EXPORT_DIR is set. With a snapshot backend
+    only the leader replica exports.
+    """
+    if not config.EXPORT_DIR:
+        return
+
+    backend = get_backend(snapshot.source)
+    if backend is not None and not backend.acquire_leadership():
+        return
+
+    # imports the tab modules and chart builders, only needed when exporting
+    from utils.kiosk import KioskExporter
+
+    _export_state['latest'] = snapshot.version
+
+    def export():
+        with _export_lock:
+            if _export_state['latest'] != snapshot.version:
+                return
+            try:
+                with span("pipeline.export"):
+                    KioskExporter(config.EXPORT_DIR).export(snapshot, views)
+            except Exception:
+                logger.exception("Exporting views of %s failed", snapshot.version)
+
+    threading.Thread(target=export, daemon=True).start()
+
+
+@instrument("pipeline.cube")
+def build_cube(region_outputs: dict) -> Cube:
+    # region is a dimension of the cube, so one cube covers every region
+    game_df, _, aspect_df = region_outputs['All'][:3]
+    return Cube.from_frames(game_df, aspect_df)
+
+
+@instrument("pipeline.activity")
+def build_activity(region_outputs: dict, previous=None, appended=None) -> ActivityBuckets:
+    """
+    Activity buckets over all regions, advanced by just the appended rows
+    when there are any, like build_aggregates.
+    """
+    if appended is not None:
+        return previous[1].activity.advanced(*appended[:2])
+
+    game_df, player_df = region_outputs['All'][:2]
+    return ActivityBuckets.from_frames(game_df, player_df)
+
+
+@instrument("pipeline.split_by_region")
+def split_by_region(outputs) -> dict:
+    """
+    Split the run_data_pipeline outputs for all data into per-region
+    outputs, keyed by region with 'All' first.
+    """
+    game_df, player_df, aspect_df, heatmap_df, full_df = outputs
+
+    region_outputs = {'All': outputs}
+
+    for region, (region_games, region_players, region_aspects) in _split_frames(
+            game_df, player_df, aspect_df).items():
+        region_outputs[region] = (
+            region_games,
+            region_players.reset_index(drop=True),
+            region_aspects,
+            get_heatmap_data(region_aspects[['hero', 'individual_aspect', 'value']]),
+            full_df[full_df['region']==region]
+        )
+
+    return region_outputs
+
+
+def get_region_outputs(snapshot: Snapshot) -> dict:
+    """
+    Return the pipeline outputs for 'All' and every region of a snapshot.
+    The pipeline runs once per data version, shared across sessions, so
+    switching regions is a dict lookup.
+    """
+
+    def build():
+        outputs = run_data_pipeline(snapshot.df)
+        persist_snapshot(snapshot, outputs)
+        return split_by_region(outputs)
+
+    return _pipeline_cache.get(('pipeline', snapshot.version, PIPELINE_FINGERPRINT), build)
 
 
 def clean_name(name):
@@ -47,6 +470,119 @@ def normalize_column_names(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def _feature(col: str) -> str:
+    # 'hero_player_2' -> 'hero'
+    return re.sub(r'_player_\d+$', '', col)
+
+
+def column_dtypes(columns: list) -> dict:
+    """
+    read_csv dtypes for normalized column names: the CATEGORICAL_DOMAINS
+    features (in every _player_N block) are parsed straight to
+    categoricals, everything else as text.
+    """
+    return {col: 'category' if _feature(col) in CATEGORICAL_DOMAINS else object
+            for col in columns}
+
+
+def validate_rows(df: pd.DataFrame) -> pd.Series:
+    """
+    Reason each row can't be used, or None when it's fine: a missing
+    required value, a number of players that isn't a whole number from 1 to
+    the number of player blocks or an outcome other than Win/Loss.
+    Submission times aren't parsed here; rows whose time can't be read are
+    still counted everywhere but the Trends tab.
+    """
+    reasons = pd.Series(None, index=df.index, dtype=object)
+
+    def reject(mask, reason):
+        # keep the first reason found for a row
+        reasons[mask & reasons.isna()] = reason
+
+    for col in REQUIRED_COLUMNS:
+        if col in df.columns:
+            reject(df[col].isna(), f"missing {col}")
+
+    if 'number_of_players' in df.columns:
+        max_players = sum(1 for col in df.columns if re.fullmatch(r'name_player_\d+', col))
+        players = pd.to_numeric(df['number_of_players'], errors='coerce')
+        valid = (players % 1 == 0) & (players >= 1)
+        if max_players:
+            valid &= players <= max_players
+        reject(df['number_of_players'].notna() & ~valid, "invalid number_of_players")
+
+    if 'outcome' in df.columns:
+        outcome = df['outcome']
+        reject(outcome.notna() & ~outcome.isin(CATEGORICAL_DOMAINS['outcome']), "unknown outcome")
+
+    return reasons
+
+
+@instrument("pipeline.apply_schema")
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the columns listed in CATEGORICAL_DOMAINS (including every
+    _player_N block of a feature) to pandas categoricals. All blocks of a
+    feature share one set of categories: the known domain, then any other
+    values seen in the data. INTEGER_COLUMNS become int64 when every value
+    is a whole number.
+    """
+    df = df.copy()
+
+    for col in INTEGER_COLUMNS:
+        if col in df.columns and not pd.api.types.is_integer_dtype(df[col]):
+            values = pd.to_numeric(df[col])
+            if values.notna().all() and (values % 1 == 0).all():
+                values = values.astype('int64')
+            df[col] = values
+
+    features = {}
+    for col in df.columns:
+        feature = _feature(col)
+        if feature in CATEGORICAL_DOMAINS:
+            features.setdefault(feature, []).append(col)
+
+    for feature, cols in features.items():
+        aliases = CATEGORICAL_ALIASES.get(feature)
+        if aliases:
+            # maps the categories only when the column is already categorical
+            for col in cols:
+                df[col] = df[col].map(lambda value: aliases.get(value, value), na_action='ignore')
+
+        domain = CATEGORICAL_DOMAINS[feature]
+        # all-NA blocks (no 4th player in any game of a chunk) are left out,
+        # pandas warns about concatenating empty values
+        values = [df[col].dropna() for col in cols]
+        values = [v for v in values if len(v)]
+        seen = pd.unique(pd.concat(values)) if values else []
+        extra = sorted(set(seen) - set(domain), key=str)
+        dtype = pd.CategoricalDtype(list(domain) + extra)
+
+        for col in cols:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # astype treats unordered dtypes with the same categories in
+                # another order as equal and would keep the old order
+                df[col] = df[col].cat.set_categories(dtype.categories)
+            else:
+                df[col] = df[col].astype(dtype)
+
+    return df
+
+
+def _stack_blocks(blocks: list, n_rows: int):
+    # categorical blocks stack on their integer codes, anything else as objects
+    if all(isinstance(b.dtype, pd.CategoricalDtype) for b in blocks if b is not None):
+        return union_categoricals(
+            [b if b is not None else pd.Categorical([np.nan] * n_rows) for b in blocks],
+            ignore_order=True)
+
+    return np.concatenate([
+        b.to_numpy(dtype=object, na_value=np.nan) if b is not None
+        else np.full(n_rows, np.nan, dtype=object)
+        for b in blocks
+    ])
+
+
 def reshape_players(
     df: pd.DataFrame,
     id_col: str = 'submission_id',
@@ -63,60 +599,54 @@ def reshape_players(
     # identify player columns that contain _player_ pattern
     player_cols = df.columns[df.columns.str.contains(player_pattern)]
 
-    # same feature order for later output
-    feature_order = (
-        pd.Series(player_cols)
-        .str.replace(r'_player_\d+$', '', regex=True)
-        .drop_duplicates()
-        .tolist()
-    )
-
-    # melt into long format
-    long = df.melt(
-        id_vars=id_col,
-        value_vars=player_cols,
-        var_name='variable',
-        value_name='value'
-    )
-
-    # from the long format, extract the feature (name, her, aspect) and the player number 
-    # and store it in a dataframe that is the 'variable' column, split across two columns
-    extracted = long['variable'].str.extract(
-        r'^(?P<feature>.+)_player_(?P<player_num>\d+)$'
-    )
-
-    # create new columns in the long df, assigning them from the values stored in extracted
-    long = long.assign(
-        feature=extracted['feature'],
-        player_num=extracted['player_num'].astype(int)
-    ).drop(columns='variable')
-
-    # with the split column names, transform the features extracted back into columns
-    player_df = (
-        long
-        .pivot_table(
-            index=[id_col, 'player_num'],
-            columns='feature',
-            values='value',
-            aggfunc='first')
-    )
-
-    # drop rows where all player info is NA (player 4 in a 3p game)
-    player_df = player_df.dropna(how='all')
-
-    # reorder feature columns to match original dataframe
-    player_df = player_df.reindex(columns=feature_order)
-
-    # cleanup for return
-    player_df = player_df.reset_index()
-    player_df.columns.name = None
-
-    return player_df
-
-
+    # parse each column name once into its feature (name, hero, aspect)
+    # and player number, keeping the feature order of the original dataframe
+    blocks = {}
+    feature_order = []
+    for col in player_cols:
+        feature, player_num = re.match(r'^(.+)_player_(\d+)$', col).groups()
+        blocks.setdefault(int(player_num), {})[feature] = col
+        if feature not in feature_order:
+            feature_order.append(feature)
+
+    player_nums = sorted(blocks)
+    n_rows = len(df)
+
+    # stack each feature's per-player column blocks end to end, player 1 rows
+    # first, filling features a player block doesn't have with NA
+    columns = {
+        id_col: np.tile(df[id_col].to_numpy(), len(player_nums)),
+        'player_num': np.repeat(np.array(player_nums, dtype='int64'), n_rows)
+    }
+    for feature in feature_order:
+        columns[feature] = _stack_blocks(
+            [df[blocks[num][feature]] if feature in blocks[num] else None
+             for num in player_nums],
+            n_rows)
+
+    player_df = pd.DataFrame(columns)
+
+    # drop rows where all player info is NA (player 4 in a 3p game),
+    # and rows without a submission id
+    has_player = player_df[feature_order].notna().any(axis=1)
+    player_df = player_df[has_player & player_df[id_col].notna()]
+
+    # order by submission, then player
+    player_df = player_df.sort_values([id_col, 'player_num'], kind='stable')
+
+    return player_df.reset_index(drop=True)
+
+
+@instrument("pipeline.merge_aspects")
 def merge_aspects(df):
     # merge aspect and multi-aspect together
-    df['aspect'] = df['aspect'].fillna(df['multi_aspect'])
+    aspect, multi_aspect = df['aspect'], df['multi_aspect']
+    if isinstance(aspect.dtype, pd.CategoricalDtype):
+        # fill values have to be categories of the aspect column
+        missing = pd.Index(multi_aspect.dropna().unique()).difference(aspect.cat.categories)
+        aspect = aspect.cat.add_categories(missing)
+        multi_aspect = multi_aspect.astype(object)
+    df['aspect'] = aspect.fillna(multi_aspect)
     df.drop('multi_aspect', axis=1, inplace=True)
     return df
 
@@ -132,60 +662,131 @@ def most_frequent_value(df: pd.DataFrame, column: str) -> str:
     return str(most_freq)
 
 
-def explode_with_weights(df, col, new_col, sep=", "):
+# separators between aspects in a multi-aspect answer; form edits have
+# produced both ", " and ";" variants, with stray spaces around either
+ASPECT_SEPARATOR = r"\s*[,;]\s*"
 
-    # Split into lists
-    df = df.copy()
-    df["_items"] = df[col].str.split(sep)
-
-    # Number of items per row
-    df["_n_items"] = df["_items"].str.len()
-
-    # Explode
-    out = df.explode("_items")
 
-    # Assign value = 1 / number of items
-    out["value"] = 1 / out["_n_items"]
+@instrument("pipeline.explode_with_weights")
+def explode_with_weights(df, col, new_col, sep=ASPECT_SEPARATOR, columns=None):
+    """
+    One row per item of the `sep`-separated values in `col`, as `new_col`,
+    weighted by `value` = 1 / number of items in the row. `sep` is a regular
+    expression; items are stripped and empty ones dropped. Missing values
+    give a single row with missing item and weight.
 
-    # Clean up
-    out = out.drop(columns=["_n_items"]).rename(columns={"_items": new_col})
+    Each distinct value is split only once and rows are repeated by index,
+    carrying just `columns` (default: all of them) alongside the items.
+    """
+    values = df[col]
+    codes, uniques = pd.factorize(values)
+    splitter = re.compile(sep)
+
+    # flat array of the items of every distinct value, with offsets into it;
+    # a trailing missing item stands in for missing values (code -1)
+    items, counts = [], []
+    for value in np.asarray(uniques, dtype=object):
+        parts = [part for part in (p.strip() for p in splitter.split(value)) if part]
+        items.extend(parts or [value.strip()])
+        counts.append(len(parts) or 1)
+    items = np.array(items + [np.nan], dtype=object)
+    counts = np.array(counts + [1])
+    starts = np.cumsum(counts) - counts
+
+    n_items = counts[codes]
+    rows = np.repeat(np.arange(len(df)), n_items)
+    within = np.arange(len(rows)) - np.repeat(np.cumsum(n_items) - n_items, n_items)
+    exploded = items[starts[codes][rows] + within]
+
+    out = df if columns is None else df[columns]
+    out = out.take(rows)
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # keep the exploded values categorical when the source column was
+        out[new_col] = pd.Categorical(exploded)
+    else:
+        out[new_col] = exploded
+
+    weights = 1 / n_items.astype(float)
+    weights[codes == -1] = np.nan
+    out["value"] = weights[rows]
 
     return out
 
 
+@instrument("pipeline.replace_with_other")
 def replace_with_other(df, allowed_set:set, col:str):
-    df[col] = df[col].where(df[col].isin(allowed_set), "Other")
+    values = df[col]
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # remap the categories once, then index the integer codes with it;
+        # the trailing 'Other' entry catches code -1 (NA) as well
+        categories = [c for c in values.cat.categories if c in allowed_set] + ["Other"]
+        lookup = np.array([categories.index(c) if c in allowed_set else len(categories) - 1
+                           for c in values.cat.categories] + [len(categories) - 1])
+        df[col] = pd.Categorical.from_codes(lookup[values.cat.codes], categories=categories)
+        return df
+
+    df[col] = values.where(values.isin(allowed_set), "Other")
     return df
 
 
-def get_heatmap_data(current_form_df):
+@instrument("pipeline.get_heatmap_data")
+def get_heatmap_data(current_form_df, metric: str = 'presence'):
+    """
+    Build the long-form hero x aspect grid for the heatmap tab, one row per
+    (hero, individual_aspect) ordered by hero.
+
+    metric 'presence' gives value 1 if the pair was played and 0 otherwise,
+    'plays' the weighted number of plays, and 'win_rate' the weighted share
+    of plays that were wins (needs an 'outcome' column, 0 if never played).
+    Each play is counted straight into a fixed hero x aspect array through
+    categorical codes, so the grid never grows with the number of plays.
+    """
 
-    aspect_list = ['Aggression', 'Basic', 'Justice', 'Leadership',
-                                       'Pool', "Protection"]
-    
-    hero_list = ["Black Panther (T'challa)", "Captain Marvel", "Ironman", "She-Hulk",
-        "Spider-Man (Peter)", "Captain America", "Ms. Marvel", "Thor", 
-        "Black Widow", "Doctor Strange", "Hulk", "Hawkeye", "Spider-Woman", 
-        "Ant-Man", "Wasp", "Quicksilver", "Scarlet Witch", "Groot", "Rocket Racoon", 
-        "Star-Lord", "Gamora", "Drax", "Venom", "Adam Warlock", "Spectrum", "Nebula",
-        "War Machine", "Valkyrie", "Vision", "Ghost-Spider", "Spider-Man (Miles)",
-        "Nova", "Ironheart", "Spider-Ham", "Sp//dr", "Colossus", "Shadowcat", "Cyclops",
-        "Phoenix", "Wolverine", "Storm", "Gambit", "Rogue", "Cable", "Domino", "Psylocke",
-        "Angel", "X-23", "Deadpool", "Magik", "Bishop", "Iceman", "Jubilee", "Nightcrawler",
-        "Magneto", "Maria Hill", "Nick Fury", "Black Panther (Shuri)", "Silk", "Falcon",
-        "Winter Soldier", "Tigra", "Hulkling", "Wonder Man", "Hercules", "Daredevil", "Echo",
-        "Jessica Jones", "Luke Cage"]
-
-    heatmap_df = pd.MultiIndex.from_product(
-            [hero_list, aspect_list],
-            names=['hero', 'individual_aspect']
-        ).to_frame(index=False)
-    
-    heatmap_df = pd.merge(heatmap_df, current_form_df, how='left', on=['hero', 'individual_aspect']).fillna(0)
-    heatmap_df.sort_values(by='hero', inplace=True)
-    heatmap_df = heatmap_df.reset_index().drop('index', axis=1)
-    heatmap_df = heatmap_df.drop_duplicates()
+    aspect_list = REFERENCE.aspects
+    hero_list = REFERENCE.heroes
 
-    heatmap_df['value'] = np.where(heatmap_df['value'] > 0, 1, 0)
+    # position of every play in the grid, -1 for heroes/aspects outside it
+    hero_codes = pd.Categorical(current_form_df['hero'], categories=hero_list).codes
+    aspect_codes = pd.Categorical(current_form_df['individual_aspect'], categories=aspect_list).codes
+    in_grid = (hero_codes >= 0) & (aspect_codes >= 0)
+    cells = hero_codes[in_grid].astype('int64') * len(aspect_list) + aspect_codes[in_grid]
 
-    return heatmap_df
\ No newline at end of file
+    n_cells = len(hero_list) * len(aspect_list)
+    weights = current_form_df['value'].to_numpy(dtype=float)[in_grid]
+    plays = np.bincount(cells, weights=weights, minlength=n_cells)
+
+    if metric == 'presence':
+        grid = np.where(plays > 0, 1, 0)
+    elif metric == 'plays':
+        grid = plays
+    elif metric == 'win_rate':
+        won = (current_form_df['outcome'] == 'Win').to_numpy()[in_grid]
+        wins = np.bincount(cells, weights=weights * won, minlength=n_cells)
+        grid = np.divide(wins, plays, out=np.zeros(n_cells), where=plays > 0)
+    else:
+        raise ValueError(f"Unknown heatmap metric '{metric}'.")
+
+    # order rows by hero name, aspects in aspect_list order within a hero
+    hero_order = REFERENCE.hero_order
+    grid = grid.reshape(len(hero_list), len(aspect_list))[hero_order]
+
+    heatmap_df = pd.DataFrame({
+        'hero': np.repeat(np.array(hero_list, dtype=object)[hero_order], len(aspect_list)),
+        'individual_aspect': np.tile(np.array(aspect_list, dtype=object), len(hero_list)),
+        'value': grid.ravel()
+    })
+
+    return heatmap_df
+
+
+def unknown_heroes(player_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Heroes played that aren't in the reference data, with their number of
+    plays. They are kept in the data but have no heatmap row.
+    """
+    plays = player_df['hero'].value_counts(sort=False)
+    plays = plays[(plays > 0) & ~plays.index.isin(REFERENCE.hero_set)]
+    return (plays.rename_axis('hero').reset_index(name='plays')
+            .sort_values('plays', ascending=False, ignore_index=True))
@@ -0,0 +1,308 @@
+import hashlib
+import io
+import os
+import threading
+import urllib.request
+from urllib.error import HTTPError
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from utils import config
+
+# columns of the quarantine table in front of the sheet's own columns
+REJECTED_COLUMNS = ['row', 'reason']
+
+
+def fetch_source(location: str, validators: dict | None = None,
+                 timeout: float = config.FETCH_TIMEOUT_SECONDS):
+    """
+    Fetch the raw CSV bytes for a sheet export URL or a local file path.
+
+    Parameters
+    ----------
+    location : str
+        http(s) URL of the CSV export, or a path to a local CSV file
+    validators : dict, optional
+        validators returned by the previous fetch (ETag/Last-Modified for
+        HTTP, mtime/size for files)
+    timeout : float, optional
+        seconds to wait for the server before raising, so a hung request
+        fails into the refresher's backoff
+
+    Returns
+    -------
+    tuple
+        (body, validators). body is None when the source reports that
+        nothing changed since the previous fetch.
+    """
+    validators = validators or {}
+
+    if location.startswith(("http://", "https://")):
+        request = urllib.request.Request(location)
+        if validators.get("etag"):
+            request.add_header("If-None-Match", validators["etag"])
+        if validators.get("last_modified"):
+            request.add_header("If-Modified-Since", validators["last_modified"])
+
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                body = response.read()
+                headers = response.headers
+        except HTTPError as err:
+            if err.code == 304:
+                return None, validators
+            raise
+
+        return body, {"etag": headers.get("ETag"),
+                      "last_modified": headers.get("Last-Modified")}
+
+    # local file stand-in for the sheet
+    stat = os.stat(location)
+    file_validators = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+    if file_validators == validators:
+        return None, validators
+
+    with open(location, "rb") as f:
+        body = f.read()
+
+    return body, file_validators
+
+
+def concat_rejected(frames: list, **kwargs) -> pd.DataFrame:
+    """
+    Concatenate quarantine tables, leaving out empty ones (they only carry
+    the columns, and pandas warns about concatenating them).
+    """
+    rows = [frame for frame in frames if len(frame)]
+    if not rows:
+        return frames[0]
+    return pd.concat(rows, **kwargs)
+
+
+def concat_frames(frames: list) -> pd.DataFrame:
+    """
+    Concatenate parsed chunks, keeping categorical columns categorical even
+    when the chunks saw different categories (pd.concat would fall back to
+    objects).
+    """
+    if len(frames) == 1:
+        return frames[0]
+
+    index = frames[0].index.append([frame.index for frame in frames[1:]])
+
+    columns = {}
+    for col in frames[0].columns:
+        parts = [frame[col] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[col] = pd.Series(union_categoricals(parts, ignore_order=True), index=index)
+        else:
+            columns[col] = pd.concat(parts)
+
+    return pd.DataFrame(columns, index=index)
+
+
+class IncrementalSheetLoader:
+    """
+    Keeps the last ingested copy of a sheet and only parses rows that were
+    appended since the previous load.
+
+    Form responses are append-only, so a new export normally starts with the
+    exact bytes of the previous one. When it does, only the trailing bytes
+    are parsed and appended. Any change to the header or to existing rows
+    (edited or deleted responses) falls back to a full reload.
+
+    CSV bytes are parsed `chunk_size` rows at a time with the dtypes that
+    `dtypes(columns)` gives for the normalized column names, so nothing is
+    type-inferred and parsing holds one chunk of raw values at a time. Rows
+    that `validate(df)` gives a reason for (None for good rows), and
+    repeated submission ids, are kept out of `df` and quarantined in
+    `rejected` with their sheet row number.
+    """
+
+    def __init__(self, location: str, normalize=None, schema=None, dtypes=None,
+                 validate=None, chunk_size: int = 50_000):
+        self.location = location
+        self.normalize = normalize
+        self.schema = schema
+        self.dtypes = dtypes
+        self.validate = validate
+        self.chunk_size = chunk_size
+        self.df = None
+        self.rejected = None
+        self.last_submission_id = None
+        self.last_submission_time = None
+        self.version = None
+
+        # set when the last load appended rows: the version appended to and
+        # the index of the first new row in df
+        self.base_version = None
+        self.appended_from = None
+
+        self._raw = b""
+        self._raw_columns = None
+        self._raw_dtypes = None
+        self._rows_parsed = 0
+        self._validators = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> pd.DataFrame:
+        with self._lock:
+            body, validators = fetch_source(self.location, self._validators)
+            self._validators = validators
+
+            if body is None and self.df is not None:
+                return self.df
+
+            if body is None or not self._can_append(body):
+                self._full_reload(body)
+            elif len(body) > len(self._raw):
+                self._append(body)
+
+            return self.df
+
+    def _can_append(self, body: bytes) -> bool:
+        if self.df is None or not body.startswith(self._raw):
+            return False
+
+        # the previous last row has to be complete, not extended in place
+        tail = body[len(self._raw):]
+        return (not tail or self._raw.endswith(b"\n")
+                or tail.startswith((b"\n", b"\r\n")))
+
+    def _full_reload(self, body: bytes | None):
+        if body is None:
+            body, self._validators = fetch_source(self.location)
+
+        self._raw_columns = pd.read_csv(io.BytesIO(body), nrows=0).columns.tolist()
+        self._raw_dtypes = self._column_dtypes(self._raw_columns)
+        self._rows_parsed = 0
+
+        df, rejected = self._parse(io.BytesIO(body), header=0)
+
+        # a repeated id is a re-submission of an earlier row, keep the first
+        if "submission_id" in df.columns:
+            repeated = df["submission_id"].duplicated() & df["submission_id"].notna()
+            if repeated.any():
+                rejected = concat_rejected([rejected, self._quarantine(
+                    df[repeated], "duplicate submission_id")])
+                df = df[~repeated]
+
+        self.rejected = rejected.sort_values("row", ignore_index=True)
+        self.base_version = self.appended_from = None
+        self._set_raw(body)
+        self._set_frame(df.reset_index(drop=True))
+
+    def _append(self, body: bytes):
+        tail = body[len(self._raw):].lstrip(b"\r\n")
+        if not tail.strip():
+            self.base_version, self.appended_from = self.version, len(self.df)
+            self._set_raw(body)
+            return
+
+        new_rows, rejected = self._parse(io.BytesIO(tail), header=None)
+
+        # re-submitted ids or dtypes that no longer fit mean the sheet was
+        # edited rather than appended to
+        if ("submission_id" in new_rows.columns
+                and (new_rows["submission_id"].isin(self.df["submission_id"]).any()
+                     or new_rows["submission_id"].duplicated().any())):
+            return self._full_reload(body)
+
+        df = self._with_new_categories(new_rows)
+        try:
+            new_rows = new_rows.astype(df.dtypes.to_dict())
+        except (ValueError, TypeError):
+            return self._full_reload(body)
+
+        if len(rejected):
+            self.rejected = concat_rejected([self.rejected, rejected], ignore_index=True)
+
+        self.base_version, self.appended_from = self.version, len(self.df)
+        self._set_raw(body)
+        self._set_frame(pd.concat([df, new_rows], ignore_index=True))
+
+    def _with_new_categories(self, new_rows: pd.DataFrame) -> pd.DataFrame:
+        # categorical columns have to know every appended value, otherwise
+        # casting the new rows would silently turn unseen values into NA
+        new_categories = {}
+        for col, dtype in self.df.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype) and col in new_rows.columns:
+                unseen = pd.Index(new_rows[col].dropna().unique()).difference(dtype.categories)
+                if len(unseen):
+                    new_categories[col] = self.df[col].cat.add_categories(sorted(unseen, key=str))
+
+        # assign builds a new frame, snapshots already handed out stay as they are
+        return self.df.assign(**new_categories) if new_categories else self.df
+
+    def _prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.normalize is not None:
+            df = self.normalize(df)
+        return df
+
+    def _column_dtypes(self, raw_columns: list) -> dict | None:
+        # dtypes are declared for normalized names, read_csv wants raw ones
+        if self.dtypes is None:
+            return None
+        columns = self._prepare(pd.DataFrame(columns=raw_columns)).columns
+        return dict(zip(raw_columns, self.dtypes(list(columns)).values()))
+
+    def _parse(self, source, header):
+        """
+        Parse CSV rows chunk by chunk into (valid rows, quarantined rows).
+        The index of both is the data row number, continuing from previous
+        parses of the same sheet.
+        """
+        valid, rejected = [], []
+
+        reader = pd.read_csv(source, header=header, names=self._raw_columns,
+                             dtype=self._raw_dtypes, chunksize=self.chunk_size)
+        for chunk in reader:
+            chunk.index = pd.RangeIndex(self._rows_parsed, self._rows_parsed + len(chunk))
+            self._rows_parsed += len(chunk)
+            chunk = self._prepare(chunk)
+
+            if self.validate is not None:
+                reasons = self.validate(chunk)
+                bad = reasons.notna()
+                if bad.any():
+                    rejected.append(self._quarantine(chunk[bad], reasons[bad]))
+                    chunk = chunk[~bad]
+
+            if self.schema is not None:
+                chunk = self.schema(chunk)
+            valid.append(chunk)
+
+        columns = list(self._prepare(pd.DataFrame(columns=self._raw_columns)).columns)
+        if not valid:
+            empty = pd.DataFrame(columns=columns)
+            valid = [empty if self.schema is None else self.schema(empty)]
+        if not rejected:
+            rejected = [pd.DataFrame(columns=REJECTED_COLUMNS + columns)]
+
+        # chunks saw different categories, settle them once for the whole frame
+        df = concat_frames(valid)
+        if self.schema is not None and len(valid) > 1:
+            df = self.schema(df)
+
+        return df, concat_rejected(rejected)
+
+    def _quarantine(self, rows: pd.DataFrame, reason) -> pd.DataFrame:
+        # values as the sheet had them; sheet rows count the header as row 1
+        rows = rows.astype("string")
+        rows.insert(0, "reason", reason)
+        rows.insert(0, "row", rows.index + 2)
+        return rows
+
+    def _set_raw(self, body: bytes):
+        # content hash of the export, identifies the data across processes
+        self._raw = body
+        self.version = hashlib.blake2b(body, digest_size=8).hexdigest()
+
+    def _set_frame(self, df: pd.DataFrame):
+        self.df = df
+
+        if len(df) and "submission_id" in df.columns:
+            self.last_submission_id = df["submission_id"].iloc[-1]
+        if len(df) and "submission_time" in df.columns:
+            self.last_submission_time = df["submission_time"].iloc[-1]
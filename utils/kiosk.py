@@ -0,0 +1,224 @@
+import html
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+
+import pyarrow as pa
+
+from tabs import aspects, heatmap, heroes, players, scenarios, stats, trends
+from utils import config
+from utils.charts import chart_spec
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+
+# Vega, Vega-Lite and vega-embed for the standalone pages; the specs are
+# written for Vega-Lite 6 by Altair
+_SCRIPTS = ["https://cdn.jsdelivr.net/npm/vega@6",
+            "https://cdn.jsdelivr.net/npm/vega-lite@6",
+            "https://cdn.jsdelivr.net/npm/vega-embed@7"]
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{scripts}
+<style>
+  body {{ font-family: sans-serif; margin: 1.5em; }}
+  .metrics {{ display: flex; flex-wrap: wrap; gap: 2.5em; margin-bottom: 1em; }}
+  .metric span {{ display: block; font-size: 2.5em; font-weight: 600; }}
+  section {{ display: inline-block; vertical-align: top; margin: 0 1.5em 1.5em 0; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<div class="metrics">{metrics}</div>
+{sections}
+<script>
+const specs = {specs};
+specs.forEach((spec, i) => vegaEmbed("#chart-" + i, spec, {{actions: false}}));
+
+// reload when a newer data version has been exported
+const version = {version};
+setInterval(() => fetch("../{manifest}", {{cache: "no-store"}})
+  .then(response => response.json())
+  .then(manifest => {{ if (manifest.version !== version) location.reload(); }})
+  .catch(() => {{}}), {poll_ms});
+</script>
+</body>
+</html>
+"""
+
+
+def slug(name) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", str(name).lower()).strip("-") or "view"
+
+
+def view_content(views, region) -> dict:
+    """
+    Metrics ((label, text) pairs) and a charts(data_key) function for each
+    exported view of a region. The charts come from the same `charts`
+    functions the tabs draw, so they share the tabs' cached specs. The Win
+    Rates tab is interactive and left out.
+    """
+    game_df, _, aspect_df, heatmap_df, _ = views.regions[region]
+    aggregates = views.aggregates[region]
+    activity = views.activity
+
+    content = {
+        'Stats': ([(label, f"{value:.0%}" if format == "percent" else f"{value:,}")
+                   for label, value, format in stats.metrics(aggregates)],
+                  lambda data_key: stats.charts(aggregates, data_key)),
+        'Scenarios': ([], lambda data_key: scenarios.charts(game_df, data_key)),
+        'Heroes': ([], lambda data_key: heroes.charts(aspect_df, data_key)),
+        'Aspects': ([], lambda data_key: aspects.charts(aggregates, data_key)),
+        'Heatmap': ([], lambda data_key: heatmap.charts(heatmap_df, data_key)),
+        'Players': ([], lambda data_key: players.charts(aggregates, data_key)),
+    }
+
+    if not activity.empty:
+        # hall screens show the widest buckets
+        minutes = trends.resolutions(activity)[-1]
+        content['Trends'] = ([(label, f"{value:,}")
+                              for label, value in trends.metrics(activity, region)],
+                             lambda data_key: trends.charts(activity, region, minutes, data_key))
+
+    return content
+
+
+def standalone_spec(spec: dict) -> dict:
+    """
+    A cached chart spec with its datasets as JSON records instead of the
+    Arrow bytes Streamlit's frontend reads, so plain vega-embed can draw it.
+    """
+    datasets = {}
+    for name, data in spec.get("datasets", {}).items():
+        if not isinstance(data, bytes):
+            # inline from Altair, see chart_spec
+            datasets[name] = data
+            continue
+        frame = pa.ipc.open_stream(data).read_all().to_pandas()
+        datasets[name] = json.loads(frame.to_json(orient="records", date_format="iso"))
+
+    return {**spec, "datasets": datasets}
+
+
+def _write(path: str, text: str):
+    # write beside the target and rename, so displays never read a partial file
+    directory = os.path.dirname(path)
+    fd, staging = tempfile.mkstemp(prefix=".staging-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(staging, path)
+    except BaseException:
+        os.unlink(staging)
+        raise
+
+
+def _script_json(value) -> str:
+    # JSON inside a <script> element can't contain "</"
+    return json.dumps(value).replace("</", "<\\/")
+
+
+class KioskExporter:
+    """
+    Standalone copies of the dashboard views for displays that never
+    interact, such as hall TVs. Each data version is rendered once, to
+    `<region>/<view>.html` (a page embedding its charts) and
+    `<region>/<view>.json` (metrics and Vega-Lite specs), with a manifest
+    written last. The pages poll the manifest and reload on a new version.
+    """
+
+    def __init__(self, directory: str, poll_seconds: float = config.CHANGE_POLL_SECONDS):
+        self.directory = directory
+        self.poll_seconds = poll_seconds
+
+    def latest_manifest(self) -> dict | None:
+        try:
+            with open(os.path.join(self.directory, MANIFEST), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def export(self, snapshot, views) -> dict:
+        """
+        Write every view of every region for a snapshot and return the new
+        manifest. A version that was already exported isn't written again.
+        """
+        previous = self.latest_manifest()
+        if previous is not None and previous.get("version") == snapshot.version:
+            return previous
+
+        files = []
+        for region in views.regions:
+            os.makedirs(os.path.join(self.directory, slug(region)), exist_ok=True)
+            data_key = (snapshot.version, region)
+
+            for view, (metrics, charts) in view_content(views, region).items():
+                charts = [(chart.heading, standalone_spec(
+                              chart_spec(chart.data_key, chart.builder, *chart.args,
+                                         **chart.kwargs)))
+                          for chart in charts(data_key)]
+
+                name = os.path.join(slug(region), slug(view))
+                self._write_view(name, snapshot.version, f"{view} - {region}", metrics, charts)
+                files += [f"{name}.html", f"{name}.json"]
+
+        manifest = {"version": snapshot.version,
+                    "loaded_at": snapshot.loaded_at,
+                    "exported_at": time.time(),
+                    "regions": [str(region) for region in views.regions],
+                    "files": files}
+        _write(os.path.join(self.directory, MANIFEST), json.dumps(manifest, indent=2))
+
+        self._remove_stale(previous, files)
+        return manifest
+
+    def _write_view(self, name: str, version: str, title: str, metrics: list, charts: list):
+        _write(os.path.join(self.directory, f"{name}.json"), json.dumps({
+            "version": version,
+            "title": title,
+            "metrics": [{"label": label, "value": value} for label, value in metrics],
+            "charts": [{"heading": heading, "spec": spec} for heading, spec in charts],
+        }))
+
+        sections = "\n".join(
+            f'<section><h2>{html.escape(heading)}</h2><div id="chart-{i}"></div></section>'
+            for i, (heading, _) in enumerate(charts))
+        metric_html = "".join(
+            f'<div class="metric">{html.escape(label)}<span>{html.escape(value)}</span></div>'
+            for label, value in metrics)
+
+        _write(os.path.join(self.directory, f"{name}.html"), _PAGE.format(
+            title=html.escape(title),
+            scripts="\n".join(f'<script src="{src}"></script>' for src in _SCRIPTS),
+            metrics=metric_html,
+            sections=sections,
+            specs=_script_json([spec for _, spec in charts]),
+            version=_script_json(version),
+            manifest=MANIFEST,
+            poll_ms=int(self.poll_seconds * 1000)))
+
+    def _remove_stale(self, previous: dict | None, files: list):
+        # files of regions or views the new version no longer has
+        if previous is None:
+            return
+        stale = set(previous.get("files", [])) - set(files)
+        for name in stale:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError as err:
+                logger.warning("Couldn't remove stale export %s: %s", name, err)
+
+        # region directories left empty
+        for region_dir in {os.path.dirname(name) for name in stale}:
+            try:
+                os.rmdir(os.path.join(self.directory, region_dir))
+            except OSError:
+                pass
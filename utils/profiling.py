@@ -0,0 +1,147 @@
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import pandas as pd
+
+from utils import config
+
+logger = logging.getLogger(__name__)
+
+# profiling is decided once at import: when disabled, `instrument` hands
+# back the undecorated function and `span` a shared no-op context
+ENABLED = config.PROFILE in ("1", "true", "memory")
+TRACE_MEMORY = config.PROFILE == "memory"
+
+_records = deque(maxlen=config.PROFILE_MAX_RECORDS)
+
+
+class _NoopSpan:
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+
+    def __init__(self, name: str, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+    def __enter__(self):
+        if TRACE_MEMORY and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._memory = tracemalloc.get_traced_memory()[0] if TRACE_MEMORY else None
+        self._started_at = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self._start
+
+        record = {
+            'name': self.name,
+            'started_at': self._started_at,
+            'seconds': seconds,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'allocated_bytes': (tracemalloc.get_traced_memory()[0] - self._memory
+                                if TRACE_MEMORY else None),
+            'thread': threading.current_thread().name,
+        }
+        _records.append(record)
+        logger.debug(json.dumps(record, default=str))
+        return False
+
+
+def span(name: str, rows_in=None):
+    """
+    Time a block of code. Set `rows_out` on the returned span to record the
+    size of what the block produced.
+
+        with span("pipeline.full_merge", rows_in=len(player_df)) as s:
+            full_df = pd.merge(...)
+            s.rows_out = len(full_df)
+    """
+    if not ENABLED:
+        return _NOOP_SPAN
+    return _Span(name, rows_in)
+
+
+def _row_count(value):
+    # snapshots carry their frame on .df, pipeline outputs are tuples
+    value = getattr(value, 'df', value)
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+
+def instrument(name: str):
+    """
+    Decorator recording a span for every call, with rows in/out taken from
+    the first DataFrame argument and the returned DataFrame (or the first
+    item of a returned tuple).
+    """
+
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            frame = next((a for a in (*args, *kwargs.values())
+                          if isinstance(a, pd.DataFrame)), None)
+
+            with span(name, rows_in=_row_count(frame)) as s:
+                result = func(*args, **kwargs)
+                s.rows_out = _row_count(result)
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def get_records() -> list:
+    return list(_records)
+
+
+def export_json() -> str:
+    return json.dumps(get_records(), default=str, indent=2)
+
+
+def summarize(records: list) -> pd.DataFrame:
+    """
+    Aggregate span records per name, slowest total time first.
+    """
+    df = pd.DataFrame(records, columns=['name', 'started_at', 'seconds', 'rows_in',
+                                        'rows_out', 'allocated_bytes', 'thread'])
+
+    return (df.groupby('name')
+            .aggregate(calls=('seconds', 'size'),
+                       total_s=('seconds', 'sum'),
+                       mean_ms=('seconds', lambda s: s.mean() * 1000),
+                       max_ms=('seconds', lambda s: s.max() * 1000),
+                       last_rows_in=('rows_in', 'last'),
+                       last_rows_out=('rows_out', 'last'),
+                       max_allocated_bytes=('allocated_bytes', 'max'))
+            .sort_values('total_s', ascending=False)
+            .reset_index())
@@ -0,0 +1,60 @@
+import hashlib
+import json
+
+import numpy as np
+
+from utils import config
+
+
+class Reference:
+    """
+    Heroes, aspects, colors and name aliases from the reference
+    data file, with the lookup tables the pipeline, heatmap and styling use
+    precomputed once.
+
+    New hero releases or alternative spellings only need an entry in the
+    file (see config.REFERENCE_PATH).
+    """
+
+    def __init__(self, data: dict):
+        # identifies the contents, for outputs that were built from them
+        self.fingerprint = hashlib.blake2b(json.dumps(data, sort_keys=True).encode(),
+                                           digest_size=8).hexdigest()
+
+        self.heroes = list(data["heroes"])
+        self.aspects = list(data["aspects"])
+
+        self.other_aspect = data["other_aspect"]["name"]
+        self.aspect_colors = {**data["aspects"],
+                              self.other_aspect: data["other_aspect"]["color"]}
+        self.outcome_colors = dict(data["outcomes"])
+
+        # alternative spellings -> the name used everywhere else
+        self.hero_aliases = dict(data.get("hero_aliases", {}))
+
+        self.hero_set = frozenset(self.heroes)
+        self.aspect_set = frozenset(self.aspects)
+
+        # heatmap rows are ordered by hero name
+        self.hero_order = np.argsort(np.array(self.heroes), kind="stable")
+
+        # cell styles for tables colored by aspect, anything else is Other
+        self.aspect_styles = {aspect: f"background-color: {color}"
+                              for aspect, color in self.aspect_colors.items()}
+        self.default_aspect_style = self.aspect_styles[self.other_aspect]
+
+        unknown = set(self.hero_aliases.values()) - self.hero_set
+        if unknown:
+            raise ValueError(f"Hero aliases point to unknown heroes: {sorted(unknown)}")
+
+    @classmethod
+    def load(cls, path: str) -> "Reference":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def aspect_style(self, aspect) -> str:
+        return self.aspect_styles.get(aspect, self.default_aspect_style)
+
+
+# loaded once per process
+REFERENCE = Reference.load(config.REFERENCE_PATH)
@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Refresher:
+    """
+    Background worker that keeps the latest data ready for reruns.
+
+    A daemon thread calls `fetch(version)` every `interval` seconds with the
+    current data version; it returns a snapshot, or None when there is
+    nothing new. When the data version changed, `transform(snapshot,
+    previous)` builds the outputs the app renders, where previous is the
+    last (snapshot, outputs) pair or None. The (snapshot, outputs) pair is swapped in as one object,
+    so readers never see a snapshot with another version's outputs.
+    Failures back off exponentially up to `max_backoff` seconds while the
+    last good data keeps being served.
+    """
+
+    def __init__(self, fetch, transform, interval: float, max_backoff: float,
+                 initial=None):
+        self.fetch = fetch
+        self.transform = transform
+        self.interval = interval
+        self.max_backoff = max_backoff
+
+        self.refreshed_at = None
+        self.failures = 0
+        self.last_error = None
+
+        self._current = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        if initial is not None:
+            self._swap(initial, self.transform(initial, None))
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="data-refresher",
+                                                daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def latest(self, timeout: float | None = None):
+        """
+        Return the current (snapshot, outputs), waiting for the first
+        successful refresh if there is nothing yet.
+        """
+        if not self._ready.wait(timeout):
+            raise TimeoutError("No data has been loaded yet.")
+        if self._current is None:
+            raise RuntimeError(f"Loading data failed: {self.last_error}")
+        return self._current
+
+    @property
+    def version(self) -> str | None:
+        current = self._current
+        return None if current is None else current[0].version
+
+    def data_age(self) -> float | None:
+        """
+        Seconds since the data was last confirmed current with the source.
+        """
+        if self.refreshed_at is None:
+            return None
+        return time.time() - self.refreshed_at
+
+    def refresh(self):
+        snapshot = self.fetch(self.version)
+
+        current = self._current
+        if snapshot is not None and (current is None
+                                     or current[0].version != snapshot.version):
+            self._swap(snapshot, self.transform(snapshot, current))
+
+        self.refreshed_at = time.time()
+        self.failures = 0
+        self.last_error = None
+
+    def _swap(self, snapshot, outputs):
+        self._current = (snapshot, outputs)
+        self.refreshed_at = snapshot.loaded_at
+        self._ready.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+                delay = self.interval
+            except Exception as err:
+                self.failures += 1
+                self.last_error = err
+                delay = min(self.interval * 2 ** self.failures, self.max_backoff)
+                logger.exception("Refreshing data failed (%d in a row), retrying in %.0fs",
+                                 self.failures, delay)
+                # let waiting readers see the error instead of hanging
+                self._ready.set()
+
+            self._stop.wait(delay)
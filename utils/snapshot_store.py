@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+
+
+class SnapshotStore:
+    """
+    Versioned on-disk copies of ingested data, one Parquet file per frame.
+
+    Each snapshot is a directory named `<saved at ms>-<data version>` with a
+    manifest written last, so a snapshot without a manifest is incomplete
+    and ignored. Only the newest `keep` snapshots are retained.
+    """
+
+    def __init__(self, directory: str, keep: int = 5):
+        self.directory = directory
+        self.keep = keep
+
+    def save(self, version: str, frames: dict, meta: dict | None = None) -> str:
+        """
+        Write `frames` (name -> DataFrame) as a new snapshot and prune old
+        ones. Returns the snapshot directory.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        # build in a temporary directory, then rename into place
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.directory)
+        try:
+            for name, df in frames.items():
+                df.to_parquet(os.path.join(staging, f"{name}.parquet"))
+
+            manifest = {"version": version,
+                        "saved_at": time.time(),
+                        "frames": list(frames),
+                        **(meta or {})}
+            with open(os.path.join(staging, MANIFEST), "w") as f:
+                json.dump(manifest, f)
+
+            path = os.path.join(self.directory, f"{int(time.time() * 1000):013d}-{version}")
+            os.rename(staging, path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self.prune()
+        return path
+
+    def snapshots(self) -> list:
+        """
+        Complete snapshot directories, oldest first.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if not name.startswith(".")
+            and os.path.exists(os.path.join(self.directory, name, MANIFEST))
+        )
+
+    def latest_manifest(self) -> dict | None:
+        snapshots = self.snapshots()
+        if not snapshots:
+            return None
+        return self._manifest(snapshots[-1])
+
+    def load_latest(self):
+        """
+        Memory-map the newest snapshot. Returns (manifest, frames) or None
+        if the store is empty.
+        """
+        # only needed to restore, so starting without a snapshot skips it
+        import pyarrow.parquet as pq
+
+        for path in reversed(self.snapshots()):
+            try:
+                manifest = self._manifest(path)
+                frames = {
+                    name: pq.read_table(os.path.join(path, f"{name}.parquet"),
+                                        memory_map=True).to_pandas()
+                    for name in manifest["frames"]
+                }
+            except (OSError, ValueError, KeyError) as err:
+                logger.warning("Skipping unreadable snapshot %s: %s", path, err)
+                continue
+
+            return manifest, frames
+
+        return None
+
+    def prune(self):
+        snapshots = self.snapshots()
+        for path in snapshots[:max(0, len(snapshots) - self.keep)]:
+            shutil.rmtree(path, ignore_errors=True)
+
+        # staging directories left behind by a process that died mid-save
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".staging-") and time.time() - os.path.getmtime(path) > 3600:
+                shutil.rmtree(path, ignore_errors=True)
+
+    @staticmethod
+    def _manifest(path: str) -> dict:
+        with open(os.path.join(path, MANIFEST)) as f:
+            return json.load(f)